@@ -1,9 +1,25 @@
-import requests
-from bs4 import BeautifulSoup
 import json
 import os
+import re
+import threading
 import time
 from openai import OpenAI
+from fetcher import fetch_all
+import http_client
+import metrics
+from page_cache import PageCache
+from extractors import englishjobs_detail
+from prompt_text import compact_profile, compress_description
+from seen_store import open_seen_store
+from dedup import shared_index
+from notifier import TelegramNotifier
+from pipeline import EnglishJobsSource, Sink, run_pipeline, stop_requested
+from job_ids import canonical_job_id
+from llm_cache import LLMCache, cache_key
+from prescreen import PRESCREEN_ENABLED, PRESCREEN_THRESHOLD, PreScreener
+from profiles import DEFAULT_PROFILE_NAME, Profile, load_profiles, merged_search_urls
+from llm_scheduler import AnalysisScheduler, RateLimited, RetryQueue
+from model_router import AI_TIMEOUT, ModelRouter, model_list
 
 USER_PROFILE = {
     "name": "Vishaal Babu",
@@ -124,84 +140,570 @@ SEARCH_URLS = {
     "Growth_Marketer": "https://englishjobs.fr/jobs/Growth_Marketer",
     "Product_Marketing_Manager": "https://englishjobs.fr/jobs/Product_Marketing_Manager",
 }
-STATE_FILE = "seen_jobs_ai.json"
+STATE_FILE = "seen_jobs_ai"  # seen_jobs_ai.db (or seen_jobs_ai.bin with SEEN_BACKEND=compact)
+LEGACY_STATE_FILE = "seen_jobs_ai.json"  # imported into STATE_FILE on first run
+PAGE_CACHE_FILE = "page_cache_ai.json"
+page_cache = PageCache(PAGE_CACHE_FILE)
+
+# --- 3. AI PROMPT ---
+# Model cascade: a cheap, fast model scores every job; jobs scoring AI_ESCALATE_SCORE or
+# more go to a stronger model for the full report. Each list (comma separated) is tried
+# in order, so a rate limited or timed out model fails over to the next one.
+SCORE_MODELS = model_list(os.environ.get("AI_SCORE_MODELS", "xiaomi/mimo-v2-flash:free"))
+REPORT_MODELS = model_list(os.environ.get("AI_REPORT_MODELS", "xiaomi/mimo-v2-flash:free"))
+# Below this the cheap model's verdict is the report (0 = every job gets the full report)
+AI_ESCALATE_SCORE = int(os.environ.get("AI_ESCALATE_SCORE", "40"))
+# With the same models on both lists the score call would only repeat the report's own
+# score line, so jobs go straight to the report (as they do for escalate_score 0)
+CASCADE = SCORE_MODELS != REPORT_MODELS
+# Stream full reports: generation stops as soon as the leading score line shows a low match,
+# and high matches show up in Telegram while they are still being written
+AI_STREAM = os.environ.get("AI_STREAM", "1") == "1"
+# Streamed reports whose score line is below this are cut off right there
+AI_CUTOFF_SCORE = int(os.environ.get("AI_CUTOFF_SCORE", "50"))
+# Seconds between edits of a report that is still being written (Telegram flood control)
+AI_LIVE_EDIT_INTERVAL = float(os.environ.get("AI_LIVE_EDIT_INTERVAL", "3"))
+# The score line has to show up this early, otherwise the report is simply read to the end
+HEADER_SEARCH_CHARS = 200
+SCORE_HEADER = re.compile(r"(MATCH SCORE|LOW MATCH)\W*(\d{1,3})\s*%", re.IGNORECASE)
+# A low match's "🛑 **Reason:** ..." line, once its line ending has streamed in
+REASON_LINE = re.compile(r"Reason:\W*(.+?)\s*\n", re.IGNORECASE)
+
+# Every prompt is a profile's prefix + one of the templates below. The prefix (role +
+# profile, rendered once per profile in PROMPT_PREFIXES) is the same byte for byte in every
+# request for that profile, so providers that cache prompt prefixes only process the
+# job-specific tail.
+PROMPT_PREFIX = """ACT AS: A Career Coach for {candidate}.
+CONTEXT:
+{profile_text}
+"""
+
+# PROMPT: Two Output Formats
+PROMPT_TEMPLATE = """
+TASK:
+1. Analyze Match % (0-100). (Be flexible on years of experience, strict on French).
+
+2. IF MATCH > 50% (Good Job), output this format:
+   🔥 **MATCH SCORE: [Score]%**
+   **Role:** [Job title]
+   💡 **Why:** [1 sentence summary]
+   ⚠️ **Gap:** [Any missing skill/language]
+   🏹 **Hook:** "[Draft 2-3 sentences connecting {hook_skills} to their problem]"
+   ❓ **Prep:** "Ask yourself: [Hard Question]"
+
+3. IF MATCH < 50% (Bad Job), output this "Mini Report" format:
+   ❄️ **LOW MATCH: [Score]%**
+   **Role:** [Job title]
+   🛑 **Reason:** [1 sentence explaining why (e.g. 'Requires Native French', 'Requires Java', 'Too Senior')].
+
+4. The score line is ALWAYS the first line, before anything else.
+
+JOB: {job_title}
+DESC:
+{job_text}
+"""
+
+# Step 1 of the cascade: just the score and the deciding reason, as JSON
+SCORE_TEMPLATE = """
+TASK: Rate how well this job matches my profile, 0-100.
+Be flexible on years of experience, strict on French.
+
+OUTPUT: ONLY a JSON object, nothing else:
+{{"score": <0-100>, "reason": "<1 sentence: the main fit, or the deal-breaker (e.g. 'Requires Native French', 'Requires Java', 'Too Senior')>"}}
+
+JOB: {job_title}
+DESC:
+{job_text}
+"""
+# Same, for several jobs in one request
+BATCH_SCORE_TEMPLATE = """
+TASK: For EVERY job below, rate how well it matches my profile, 0-100.
+Be flexible on years of experience, strict on French.
+
+OUTPUT: ONLY a JSON array, one object per job, nothing else:
+[{{"id": <job id>, "score": <0-100>, "reason": "<1 sentence: the main fit, or the deal-breaker (e.g. 'Requires Native French', 'Requires Java', 'Too Senior')>"}}]
+
+JOBS:
+{jobs}
+"""
+# What a job below AI_ESCALATE_SCORE gets instead of a full report (the prompt's "Mini Report")
+LOW_MATCH_REPORT = "❄️ **LOW MATCH: {score}%**\n**Role:** {job_title}\n🛑 **Reason:** {reason}"
+BATCH_JOB_TEMPLATE = """
+### JOB {id}: {job_title}
+DESC:
+{job_text}
+"""
+# Jobs scored in one LLM request (1 = one request per job); full reports are always one per job.
+# Only applies to profiles that make the score call at all: needs AI_SCORE_MODELS and
+# AI_REPORT_MODELS to differ and an escalate score above 0 (see single_stage).
+AI_BATCH_SIZE = int(os.environ.get("AI_BATCH_SIZE", "1"))
+
+# Analyses are memoized on disk (keyed by job text, profile, prompt and models). Opened by
+# the sink, not on import: importing this module (pipeline.py, daemon.py, the bench) must
+# not create the db in whatever directory it runs from.
+LLM_CACHE_FILE = "llm_cache.db"
+llm_cache = None
+
+def open_llm_cache():
+    global llm_cache
+    if llm_cache is None:
+        llm_cache = LLMCache(LLM_CACHE_FILE)
+    return llm_cache
 
 # Secrets
 BOT_TOKEN = os.environ.get("BOT_TOKEN")
 CHAT_ID = os.environ.get("CHAT_ID")
 OPENROUTER_API_KEY = os.environ.get("OPENROUTER_API_KEY")
+# Any OpenAI-compatible endpoint works (bench/stubs.py serves one for offline runs)
+OPENROUTER_BASE_URL = os.environ.get("OPENROUTER_BASE_URL", "https://openrouter.ai/api/v1")
 
 client = None
+score_router = report_router = None
 if OPENROUTER_API_KEY:
     client = OpenAI(
-        base_url="https://openrouter.ai/api/v1",
+        base_url=OPENROUTER_BASE_URL,
         api_key=OPENROUTER_API_KEY,
+        max_retries=0,  # 429s are handled by the routers and the AnalysisScheduler, not by blind client retries
+        timeout=AI_TIMEOUT,
     )
+    score_router = ModelRouter(client, SCORE_MODELS, "score")
+    # The cheap models come last: a report from them beats no report at all
+    report_router = ModelRouter(client, REPORT_MODELS + SCORE_MODELS, "report")
+
+# Jobs the LLM could not analyze; they stay unseen and are retried next run
+RETRY_QUEUE_FILE = "retry_queue_ai.json"
+
+# Alerts are queued and sent as digests; undelivered ones are retried next run
+PENDING_ALERTS_FILE = "pending_alerts_ai.json"
+notifier = TelegramNotifier(BOT_TOKEN, CHAT_ID, "Markdown", PENDING_ALERTS_FILE)
+
+# --- 4. PROFILES ---
+# USER_PROFILE is the built-in candidate; profiles/*.json add more (see profiles.py).
+# One sweep serves them all and every job is matched against every profile at once.
+DEFAULT_PROFILE = Profile(
+    DEFAULT_PROFILE_NAME, CHAT_ID, USER_PROFILE, search_urls=SEARCH_URLS,
+    hook_skills="my N8N/Python/Growth metrics", prescreen_threshold=PRESCREEN_THRESHOLD,
+    escalate_score=AI_ESCALATE_SCORE, cutoff_score=AI_CUTOFF_SCORE,
+)
+# (a profile file without a "profile" section has nothing to match against)
+PROFILES = [profile for profile in load_profiles(DEFAULT_PROFILE) if profile.user_profile]
+# Rendered once per profile: terse text instead of indented JSON, no contact details
+PROMPT_PREFIXES = {
+    profile.name: PROMPT_PREFIX.format(candidate=profile.candidate, profile_text=compact_profile(profile.user_profile))
+    for profile in PROFILES
+}
+notifiers = {DEFAULT_PROFILE_NAME: notifier}
+for profile in PROFILES[1:]:
+    notifiers[profile.name] = TelegramNotifier(BOT_TOKEN, profile.chat_id, "Markdown", profile.file_name(PENDING_ALERTS_FILE))
+
+# Cheap local scoring against every profile; obvious non-matches never reach the LLM
+prescreener = PreScreener(
+    [profile.user_profile for profile in PROFILES],
+    [profile.prescreen_threshold for profile in PROFILES],
+    [profile.hard_rules for profile in PROFILES],
+)
+
+def send_telegram(message, profile=DEFAULT_PROFILE):
+    notifiers[profile.name].send(message)
+
+def fetch_job_text(job_link):
+    with metrics.timer("detail fetch"):
+        # Detail pages are the long tail of a run; a slow one gets a hedge (HTTP_HEDGE_AFTER)
+        r = http_client.get(job_link, hedge=True)
+    with metrics.timer("detail parse"):
+        text = englishjobs_detail(r.text)
+    # Boilerplate stripped, requirements/languages first, cut to the token budget
+    with metrics.timer("compress"):
+        return compress_description(text)
 
-def send_telegram(message):
-    if not BOT_TOKEN or not CHAT_ID: return
-    url = f"https://api.telegram.org/bot{BOT_TOKEN}/sendMessage"
-    payload = {"chat_id": CHAT_ID, "text": message, "parse_mode": "Markdown"}
+def fetch_description(job_link, _url):
+    if stop_requested.is_set():
+        return None  # out of time: the job goes to the retry queue instead
     try:
-        requests.post(url, json=payload, timeout=10)
+        return fetch_job_text(job_link)
     except Exception as e:
-        print(f"Telegram Fail: {e}")
+        print(f"Description Error: {e}")
+        return None
+
+def extract_json(answer, opener, closer):
+    # Models like to wrap JSON in prose or ``` fences; keep just the JSON value
+    start, end = answer.find(opener), answer.rfind(closer)
+    if start == -1 or end <= start:
+        raise ValueError(f"no JSON in answer: {answer[:80]!r}")
+    return json.loads(answer[start:end + 1])
+
+def verdict(item):
+    return max(0, min(100, int(item["score"]))), str(item.get("reason") or "").strip()
+
+def score_job(job_title, job_text, profile=DEFAULT_PROFILE):
+    """Cheap first pass: (score, reason) from the first score model that answers."""
+    prefix = PROMPT_PREFIXES[profile.name]
+    # Same job text + profile + prompt + models = same answer, so reuse it
+    key = cache_key(job_text, job_title, prefix, SCORE_TEMPLATE, *score_router.models)
+    cached = llm_cache.get(key)
+    if cached is not None:
+        print("⚡ Reusing cached score.")
+        return tuple(json.loads(cached))
+    _, answer = score_router.complete(prefix + SCORE_TEMPLATE.format(job_title=job_title, job_text=job_text))
+    score, reason = verdict(extract_json(answer, "{", "}"))
+    llm_cache.put(key, json.dumps([score, reason]))
+    return score, reason
+
+# (link, profile name) pairs whose report already reached the chat live; the sink must not send them again
+delivered_live = set()
+stream_stats = {"streamed": 0, "cut_off": 0}
+_stats_lock = threading.Lock()
+
+class LiveAlert:
+    """A high-match report shown in Telegram while the model is still writing it."""
+
+    def __init__(self, link, notifier):
+        self.link = link
+        self.notifier = notifier
+        self.message_id = None
+        self.updated = 0.0
+
+    def _show(self, text):
+        self.updated = time.monotonic()
+        if self.message_id is None:
+            self.message_id = self.notifier.send_now(text)
+            return self.message_id is not None
+        return self.notifier.edit(self.message_id, text)
+
+    def update(self, report):
+        if time.monotonic() - self.updated >= AI_LIVE_EDIT_INTERVAL:
+            self._show(f"{report.strip()}\n\n✍️ ...")
+
+    def finish(self, report):
+        """Final version, with the link; False if it never reached the chat."""
+        return self._show(f"{report.strip()}\n\n🔗 [View Job]({self.link})")
+
+    def abandon(self):
+        if self.message_id is not None:
+            self.notifier.edit(self.message_id, f"⚠️ Report interrupted, it will be retried.\n\n🔗 [View Job]({self.link})")
 
-def analyze_job_with_ai(job_title, job_link):
-    print(f"🤖 AI Analyzing: {job_title}...")
+def stream_report(job_title, job_link, prompt, reason, profile=DEFAULT_PROFILE):
+    """Streams the full report: stops at a low score line, shows high matches live."""
+    _, pieces = report_router.stream(prompt)
+    report, score, live, low = "", None, None, None
+    try:
+        for piece in pieces:
+            report += piece
+            if score is None:
+                header = SCORE_HEADER.search(report)
+                if header:
+                    score = int(header.group(2))
+                    if score < profile.cutoff_score:
+                        low = header.end()  # verdict is in; the rest would only restate it
+                    else:
+                        live = LiveAlert(job_link, notifiers[profile.name])
+                elif len(report) > HEADER_SEARCH_CHARS:
+                    score = -1  # no score line; nothing to cut on
+            if low is not None:
+                # The scorer's reason, or else the model's own Reason line once it is complete
+                own = None if reason else REASON_LINE.search(report, low)
+                if reason or own or len(report) > low + HEADER_SEARCH_CHARS:
+                    with _stats_lock:
+                        stream_stats["cut_off"] += 1
+                    reason = reason or (own.group(1) if own else "Below the cut-off score")
+                    return LOW_MATCH_REPORT.format(score=score, job_title=job_title, reason=reason)
+            if live:
+                live.update(report)
+    except Exception:
+        if live:
+            live.abandon()
+        raise
+    finally:
+        pieces.close()
+        with _stats_lock:
+            stream_stats["streamed"] += 1
+    if live and live.finish(report):
+        delivered_live.add((job_link, profile.name))
+    return report.strip()
+
+def write_report(job_title, job_link, job_text, score, reason, profile=DEFAULT_PROFILE):
+    """The report for a scored job: full write-up when it is worth it, mini report otherwise.
+
+    score and reason are None for jobs that skip the score call (see single_stage).
+    """
+    if score is not None and score < profile.escalate_score:
+        return LOW_MATCH_REPORT.format(score=score, job_title=job_title, reason=reason)
+
+    prefix = PROMPT_PREFIXES[profile.name]
+    key = cache_key(job_text, job_title, prefix, PROMPT_TEMPLATE, profile.hook_skills, *report_router.models)
+    cached = llm_cache.get(key)
+    if cached is not None:
+        print("⚡ Reusing cached analysis.")
+        return cached
+    if score is not None:
+        print(f"⬆️ Escalating {job_title} ({score}%) for the full report.")
+    prompt = prefix + PROMPT_TEMPLATE.format(job_title=job_title, job_text=job_text, hook_skills=profile.hook_skills)
+    if AI_STREAM:
+        analysis = stream_report(job_title, job_link, prompt, reason, profile)
+    else:
+        _, analysis = report_router.complete(prompt)
+    llm_cache.put(key, analysis)
+    return analysis
+
+def single_stage(profile):
+    """True when the score call would buy nothing: every job gets the report anyway, or the same models write both."""
+    return not CASCADE or profile.escalate_score <= 0
+
+def batch_size(profile):
+    # Batching only shares the score call; single-stage jobs go one report per request
+    return 1 if single_stage(profile) else max(1, AI_BATCH_SIZE)
+
+@metrics.timed("analyze")
+def analyze_job_with_ai(job_title, job_link, job_text=None, profile=DEFAULT_PROFILE):
+    print(f"🤖 AI Analyzing: {job_title}" + ("" if profile.is_default else f" for {profile.name}") + "...")
     
     try:
-        # Scrape Description
-        headers = {"User-Agent": "Mozilla/5.0"}
-        r = requests.get(job_link, headers=headers, timeout=10)
-        soup = BeautifulSoup(r.text, "html.parser")
-        description_div = soup.find("div", class_="job-description") 
-        if not description_div: description_div = soup.find("body")
-        job_text = description_div.get_text(separator="\n", strip=True)[:4000]
-        
-        # PROMPT: Two Output Formats
-        prompt = f"""
-        ACT AS: A Career Coach for Vishaal Babu.
-        CONTEXT: {json.dumps(USER_PROFILE, indent=2)}
-        JOB: {job_title}
-        DESC: {job_text}
-        
-        TASK:
-        1. Analyze Match % (0-100). (Be flexible on years of experience, strict on French).
-        
-        2. IF MATCH > 50% (Good Job), output this format:
-           🔥 **MATCH SCORE: [Score]%**
-           **Role:** {job_title}
-           💡 **Why:** [1 sentence summary]
-           ⚠️ **Gap:** [Any missing skill/language]
-           🏹 **Hook:** "[Draft 2-3 sentences connecting my N8N/Python/Growth metrics to their problem]"
-           ❓ **Prep:** "Ask yourself: [Hard Question]"
-
-        3. IF MATCH < 50% (Bad Job), output this "Mini Report" format:
-           ❄️ **LOW MATCH: [Score]%**
-           **Role:** {job_title}
-           🛑 **Reason:** [1 sentence explaining why (e.g. 'Requires Native French', 'Requires Java', 'Too Senior')].
-        """
-        
-        completion = client.chat.completions.create(
-            model="xiaomi/mimo-v2-flash:free", 
-            messages=[{"role": "user", "content": prompt}],
-            extra_headers={"HTTP-Referer": "https://github.com/vishaalgrizzly", "X-Title": "Job Hunter Bot"},
-        )
-        return completion.choices[0].message.content.strip()
+        # Scrape Description (unless the pre-screen already did)
+        if job_text is None:
+            job_text = fetch_job_text(job_link)
+        score, reason = (None, None) if single_stage(profile) else score_job(job_title, job_text, profile)
+        return write_report(job_title, job_link, job_text, score, reason, profile)
         
+    except RateLimited:
+        raise
     except Exception as e:
         print(f"AI Error: {e}")
         return None
 
+def analyze_jobs_batch(jobs):
+    """Analyzes a list of (title, link, job_text or None, profile), all for the same profile:
+    one request scores them all. Returns {link: analysis or None}.
+    """
+    profile = jobs[0][3]
+    if len(jobs) == 1 or single_stage(profile):
+        # (nothing to batch without a score call)
+        return {job[1]: analyze_job_with_ai(*job) for job in jobs}
+
+    prefix = PROMPT_PREFIXES[profile.name]
+    print(f"🤖 AI Scoring a batch of {len(jobs)} jobs" + ("" if profile.is_default else f" for {profile.name}") + "...")
+    results, texts, scores, pending = {}, {}, {}, []
+    for title, link, job_text, _ in jobs:
+        try:
+            texts[link] = job_text if job_text is not None else fetch_job_text(link)
+        except Exception as e:
+            print(f"AI Error: {e}")
+            results[link] = None
+            continue
+        key = cache_key(texts[link], title, prefix, BATCH_SCORE_TEMPLATE, *score_router.models)
+        cached = llm_cache.get(key)
+        if cached is not None:
+            scores[link] = tuple(json.loads(cached))
+        else:
+            pending.append((title, link, key))
+
+    if pending:
+        listing = "".join(
+            BATCH_JOB_TEMPLATE.format(id=i, job_title=title, job_text=texts[link])
+            for i, (title, link, _) in enumerate(pending, 1)
+        )
+        try:
+            _, answer = score_router.complete(prefix + BATCH_SCORE_TEMPLATE.format(jobs=listing))
+            verdicts = {int(item["id"]): verdict(item) for item in extract_json(answer, "[", "]")}
+        except RateLimited:
+            raise
+        except Exception as e:
+            # Unusable batch answer: fall back to one request per job
+            print(f"AI Batch Error ({e}), analyzing one by one.")
+            for title, link, _ in pending:
+                results[link] = analyze_job_with_ai(title, link, texts[link], profile)
+            return results
+        for i, (title, link, key) in enumerate(pending, 1):
+            if i in verdicts:
+                llm_cache.put(key, json.dumps(verdicts[i]))
+                scores[link] = verdicts[i]
+            else:
+                results[link] = None
+
+    # Escalations are one request each (the full report is long; batching it buys little)
+    for title, link, _, _ in jobs:
+        if link in scores:
+            try:
+                results[link] = write_report(title, link, texts[link], *scores[link], profile)
+            except RateLimited:
+                raise
+            except Exception as e:
+                print(f"AI Error: {e}")
+                results[link] = None
+    return results
+
 def load_seen_jobs():
-    if not os.path.exists(STATE_FILE): return set()
-    try:
-        with open(STATE_FILE, "r") as f: return set(json.load(f))
-    except: return set()
+    return open_seen_store(STATE_FILE, legacy_json=LEGACY_STATE_FILE)
 
 def save_seen_jobs(jobs):
-    with open(STATE_FILE, "w") as f: json.dump(list(jobs), f)
+    jobs.save()
+
+class AIAnalysisSink(Sink):
+    """Collects new jobs during the sweep, then pre-screens and analyzes them with the LLM."""
+
+    name = "ai"
+
+    def __init__(self, dedup_index=None):
+        self.dedup_index = dedup_index
+        open_llm_cache()
+        unbatched = [profile.name for profile in PROFILES if single_stage(profile)]
+        if AI_BATCH_SIZE > 1 and unbatched:
+            print(f"⚠️ AI_BATCH_SIZE={AI_BATCH_SIZE} is ignored for {', '.join(unbatched)}: there is no score call to batch "
+                  "(set AI_SCORE_MODELS and AI_REPORT_MODELS to different models and an escalate score above 0).")
+
+    def start(self):
+        self.seen_jobs = load_seen_jobs()
+        self.dedup_index = self.dedup_index or shared_index()
+        self.retry_queue = RetryQueue(RETRY_QUEUE_FILE)
+        stream_stats.update(streamed=0, cut_off=0)
+        # Last run's leftovers go first (their listing page may not even change again)
+        self.new_jobs, self.queued = [], set()
+        self.retry_profiles = {}  # link -> names of the profiles it still has to be analyzed for
+        for title, link in self.retry_queue.pending():
+            if link in self.seen_jobs:
+                self.retry_queue.done(link)
+            else:
+                self.new_jobs.append((title, link))
+                self.queued.add(canonical_job_id(link))
+                self.retry_profiles[link] = self.retry_queue.profiles(link)
+        if self.new_jobs:
+            print(f"Retrying {len(self.new_jobs)} job(s) the AI could not analyze last time.")
+
+    def is_new(self, job_id, category=None):
+        return job_id not in self.seen_jobs
+
+    def consume(self, category, postings):
+        for item in postings:
+            job_id, title, link = item["job_id"], item["title"], item["link"]
+            if job_id in self.queued or job_id in self.seen_jobs: continue
+
+            # Same posting already alerted (other source or a repost): don't pay for another LLM call
+            duplicate = self.dedup_index.check_and_add(job_id, "englishjobs", title)
+            if duplicate and not duplicate[2]:
+                print(f"{title} may be the same posting as {duplicate[1]} ({duplicate[0]}); analyzing it anyway.")
+            elif duplicate:
+                print(f"Skipping {title}: same posting as {duplicate[1]} ({duplicate[0]}).")
+                self.seen_jobs.add(job_id)
+                continue
+
+            self.queued.add(job_id)
+            self.new_jobs.append((title, link))
+
+    def wanted(self, link, profile):
+        names = self.retry_profiles.get(link)
+        return names is None or profile.name in names
+
+    def finish(self):
+        seen_jobs, new_jobs, retry_queue = self.seen_jobs, self.new_jobs, self.retry_queue
+        found = dict.fromkeys(notifiers, 0)
+        rejected = dict.fromkeys(notifiers, 0)
+        failed = {}  # link -> names of the profiles the LLM could not analyze it for
+        retrying = []
+
+        def unanalyzed(title, link, names):
+            # Not marked seen: it goes back into the queue (for these profiles only), unless it has failed too often
+            if retry_queue.failed(title, link, names):
+                retrying.append(link)
+            else:
+                print(f"Giving up on {title} after {retry_queue.limit} failed runs.")
+                seen_jobs.add(link)
+
+        # Scrape all descriptions concurrently, then score them against every profile in one go
+        texts = dict(fetch_all({link: link for _, link in new_jobs}, fetch_description))
+        verdicts = {}  # link -> (score, reason) per profile, in PROFILES order
+        if PRESCREEN_ENABLED:
+            screened = [link for _, link in new_jobs if texts.get(link)]
+            with metrics.timer("prescreen"):
+                verdicts = dict(zip(screened, prescreener.screen([texts[link] for link in screened])))
+
+        # Only the job/profile pairs that clear the pre-screen cost an LLM call
+        candidates = {profile.name: [] for profile in PROFILES}
+        pairs = 0
+        for title, link in new_jobs:
+            for i, profile in enumerate(PROFILES):
+                if not self.wanted(link, profile):
+                    continue
+                pairs += 1
+                reason = verdicts[link][i][1] if link in verdicts else None
+                if reason is None:
+                    candidates[profile.name].append((title, link, texts.get(link), profile))
+                    continue
+                # Same "Mini Report" the LLM would have written, minus the LLM call
+                send_telegram(
+                    f"❄️ **LOW MATCH (pre-screen)**\n**Role:** {title}\n🛑 **Reason:** {reason}\n\n🔗 [View Job]({link})",
+                    profile,
+                )
+                rejected[profile.name] += 1
+        to_llm = sum(len(jobs) for jobs in candidates.values())
+        if sum(rejected.values()):
+            print(f"Pre-screen rejected {sum(rejected.values())} of {pairs} job/profile pairs; {to_llm} go to the LLM.")
+
+        # Call AI: concurrent requests (optionally several jobs of one profile per request) under one rate limit
+        batches = []
+        for profile in PROFILES:
+            jobs, size = candidates[profile.name], batch_size(profile)
+            batches += [jobs[i:i + size] for i in range(0, len(jobs), size)]
+        given_up = 0
+        for batch, analyses in AnalysisScheduler(stop=stop_requested).run(batches, analyze_jobs_batch):
+            if analyses is None:
+                # Still rate limited after every retry, or out of time: queue these for the next run
+                given_up += len(batch)
+                analyses = {}
+            for title, link, _, profile in batch:
+                ai_analysis = analyses.get(link)
+                if not ai_analysis:
+                    failed.setdefault(link, []).append(profile.name)
+                    continue
+            
+                # ALWAYS SEND (Transparency Mode), unless it was already written out live
+                if (link, profile.name) in delivered_live:
+                    delivered_live.discard((link, profile.name))
+                else:
+                    send_telegram(f"{ai_analysis}\n\n🔗 [View Job]({link})", profile)
+                found[profile.name] += 1
+        if given_up:
+            print(f"Gave up on {given_up} job(s) for this run (rate limited or out of time).")
+
+        # A job is done once every profile has its answer
+        for title, link in new_jobs:
+            if link in failed:
+                unanalyzed(title, link, failed[link])
+            else:
+                seen_jobs.add(link)
+                retry_queue.done(link)
+
+        # ALWAYS SAVE MEMORY (the listing page cache is saved by the pipeline)
+        self.dedup_index.save()
+        llm_cache.save()
+        retry_queue.save()
+        print(llm_cache.stats())
+        for label, router in (("Score", score_router), ("Report", report_router)):
+            print(f"{label} models: {router.stats()}")
+        if stream_stats["streamed"]:
+            print(f"Streamed {stream_stats['streamed']} reports, cut off {stream_stats['cut_off']} after a low score line.")
+        if retrying:
+            print(f"{len(retrying)} job(s) queued for retry next run.")
+        if seen_jobs.added:
+            save_seen_jobs(seen_jobs)
+            print(f"Memory updated. Total seen: {len(seen_jobs)}")
+        else:
+            print("No new jobs scanned.")
+
+        for profile in PROFILES:
+            new_jobs_found, skipped = found[profile.name], rejected[profile.name]
+            if new_jobs_found > 0 or skipped:
+                print(f"Sent {new_jobs_found} AI reports" + ("." if profile.is_default else f" to {profile.name}."))
+                send_telegram(
+                    f"🏁 **AI Batch Complete**: Analyzed {new_jobs_found} new jobs."
+                    + (f" Pre-screen skipped {skipped}." if skipped else ""),
+                    profile,
+                )
+            else:
+                print("Run Complete. No matches found." if profile.is_default else f"No matches for {profile.name}.")
+                # UNCOMMENT THIS LINE TO GET THE HEARTBEAT:
+                send_telegram("🤖 **AI Check Complete**: No new jobs to analyze.", profile)
+
+        for profile_notifier in notifiers.values():
+            profile_notifier.flush()
 
 def main():
     if not client:
@@ -209,54 +711,10 @@ def main():
         return
 
     print("--- AI JOB AGENT STARTED ---")
-    seen_jobs = load_seen_jobs()
-    start_count = len(seen_jobs)
-    new_jobs_found = 0
-    
-    for category, url in SEARCH_URLS.items():
-        try:
-            print(f"Checking {category}...")
-            r = requests.get(url, headers={"User-Agent": "Mozilla/5.0"}, timeout=10)
-            soup = BeautifulSoup(r.text, "html.parser")
-            jobs = soup.find_all("a", href=True)
-            
-            for job in jobs:
-                if "/job/" in job["href"]:
-                    link = "https://englishjobs.fr" + job["href"]
-                    title = job.get_text(strip=True)
-                    
-                    if link in seen_jobs: continue
-                    
-                    # Call AI
-                    ai_analysis = analyze_job_with_ai(title, link)
-                    
-                    # ALWAYS SEND (Transparency Mode)
-                    if ai_analysis:
-                        send_telegram(f"{ai_analysis}\n\n🔗 [View Job]({link})")
-                        new_jobs_found += 1
-                        
-                    seen_jobs.add(link)
-                    time.sleep(5) 
-                    
-        except Exception as e:
-            print(f"Scraping Error: {e}")
-
-    # ALWAYS SAVE MEMORY
-    if len(seen_jobs) > start_count:
-        save_seen_jobs(seen_jobs)
-        print(f"Memory updated. Total seen: {len(seen_jobs)}")
-    else:
-        print("No new jobs scanned.")
-
-    # ... inside main() function ...
-
-    if new_jobs_found > 0:
-        print(f"Sent {new_jobs_found} AI reports.")
-        send_telegram(f"🏁 **AI Batch Complete**: Analyzed {new_jobs_found} new jobs.")
-    else:
-        print("Run Complete. No matches found.")
-        # UNCOMMENT THIS LINE TO GET THE HEARTBEAT:
-        send_telegram("🤖 **AI Check Complete**: No new jobs to analyze.")
+    summary = run_pipeline(EnglishJobsSource(merged_search_urls(PROFILES), page_cache), [AIAnalysisSink()], "ai")
+    if summary:
+        send_telegram(summary)
+        notifier.flush()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,305 @@
+"""Offline end-to-end benchmark: runs the bots against the local stubs in bench/stubs.py.
+
+Usage: python bench/e2e_bench.py [--targets watcher,ai,linkedin,sweep] [--runs N]
+                                 [--real-delays] [--env KEY=VALUE ...]
+                                 [--json out.json] [--baseline old.json [--max-regression PCT]]
+                                 [stub knobs: --llm-latency S --llm-429-every N ...]
+
+Every target runs in its own process with a fresh state directory, so run 1 is a cold
+start and later runs see the state the earlier ones left (page cache, seen jobs, LLM
+cache). Requests to englishjobs.fr and LinkedIn are routed to the stubs; OpenRouter
+and Telegram are pointed at them through OPENROUTER_BASE_URL and TELEGRAM_API_BASE.
+By default every politeness delay is zeroed so the numbers show the code, not the
+sleeps; --real-delays keeps the production values.
+
+Reported per run: wall time, jobs swept per second, peak RSS, and busy time per stage
+(summed over threads, so concurrent stages can add up to more than the wall time).
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from contextlib import redirect_stdout
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, BENCH_DIR)
+from stubs import add_config_arguments, config_from_args, start_stub_server  # noqa: E402
+
+TARGETS = {
+    "watcher": ("main", "main"),
+    "ai": ("ai_job_agent", "main"),
+    "linkedin": ("linkedin", "scrape_linkedin"),
+    "sweep": ("pipeline", "main"),
+}
+# Production hosts the scrapers hit directly (through http_client)
+SCRAPED_HOSTS = ("https://englishjobs.fr", "https://www.linkedin.com", "https://fr.linkedin.com")
+# Politeness delays zeroed unless --real-delays
+NO_DELAYS = {
+    "FETCH_PER_HOST_INTERVAL": "0",
+    "PACING_MIN_DELAY": "0",
+    "PACING_START_DELAY": "0",
+    "PACING_MAX_DELAY": "8",
+    "TELEGRAM_MIN_INTERVAL": "0",
+    "TELEGRAM_DIGEST_WINDOW": "0.2",
+    "AI_REQUESTS_PER_MINUTE": "60000",
+}
+
+
+# --- WORKER (one target, inside its own process) ---
+
+class StageTimer:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.stages = {}
+            self.jobs = 0
+
+    def add(self, stage, seconds):
+        with self._lock:
+            calls, busy = self.stages.get(stage, (0, 0.0))
+            self.stages[stage] = (calls + 1, busy + seconds)
+
+    def timed(self, stage, fn):
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self.add(stage, time.perf_counter() - start)
+        return wrapper
+
+
+def instrument(timer, stub_url):
+    """Routes the scrapers to the stubs and wraps every stage in a timer."""
+    import ai_job_agent
+    import dedup
+    import http_client
+    import linkedin
+    import llm_cache
+    import notifier
+    import page_cache
+    import pipeline
+    import prescreen
+    import seen_store
+
+    def local(url):
+        for host in SCRAPED_HOSTS:
+            if url.startswith(host):
+                return stub_url + url[len(host):]
+        return url
+
+    def stage_of(url):
+        if "seeMoreJobPostings" in url:
+            return "fetch linkedin"
+        return "fetch detail" if "/job/" in url else "fetch listing"
+
+    real_get, real_post = http_client.get, http_client.post
+
+    def get(url, **kwargs):
+        return timer.timed(stage_of(url), real_get)(local(url), **kwargs)
+
+    def post(url, **kwargs):
+        return real_post(local(url), **kwargs)
+
+    http_client.get, http_client.post = get, post
+
+    # The extractors are generators; the wrappers hand back lists so the parse is timed
+    pipeline.englishjobs_listing = timer.timed("parse", lambda html, f=pipeline.englishjobs_listing: list(f(html)))
+    linkedin.linkedin_cards = timer.timed("parse", lambda html, f=linkedin.linkedin_cards: list(f(html)))
+    ai_job_agent.englishjobs_detail = timer.timed("parse", ai_job_agent.englishjobs_detail)
+    ai_job_agent.compress_description = timer.timed("compress", ai_job_agent.compress_description)
+    ai_job_agent.score_job = timer.timed("llm score", ai_job_agent.score_job)
+    ai_job_agent.write_report = timer.timed("llm report", ai_job_agent.write_report)
+    prescreen.PreScreener.screen = timer.timed("prescreen", prescreen.PreScreener.screen)
+    notifier.TelegramNotifier._call = timer.timed("telegram", notifier.TelegramNotifier._call)
+    for cls in (seen_store.SeenStore, seen_store.CompactSeenStore, dedup.DedupIndex, llm_cache.LLMCache,
+                page_cache.PageCache):
+        cls.save = timer.timed("state save", cls.save)
+
+    def counted(sweep):
+        def wrapper(self, is_new=None):
+            for category, postings in sweep(self, is_new):
+                with timer._lock:
+                    timer.jobs += len(postings)
+                yield category, postings
+        return wrapper
+
+    pipeline.EnglishJobsSource.sweep = counted(pipeline.EnglishJobsSource.sweep)
+    linkedin.LinkedInSource.sweep = counted(linkedin.LinkedInSource.sweep)
+
+
+def peak_rss_mb():
+    try:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KB on Linux
+    except ImportError:
+        return None
+
+
+def worker(target, runs, stub_url, out_path):
+    sys.path.insert(0, REPO_DIR)
+    timer = StageTimer()
+    with open("import.log", "w") as log, redirect_stdout(log):
+        instrument(timer, stub_url)
+        module_name, function_name = TARGETS[target]
+        fn = getattr(__import__(module_name), function_name)
+
+    results = []
+    for run in range(1, runs + 1):
+        timer.reset()
+        with open(f"run{run}.log", "w") as log, redirect_stdout(log):
+            start = time.perf_counter()
+            fn()
+            wall = time.perf_counter() - start
+        results.append({
+            "run": run,
+            "wall": wall,
+            "jobs": timer.jobs,
+            "jobs_per_sec": timer.jobs / wall if wall else 0.0,
+            "peak_rss_mb": peak_rss_mb(),
+            "stages": {stage: {"calls": calls, "busy": busy} for stage, (calls, busy) in sorted(timer.stages.items())},
+        })
+    with open(out_path, "w") as f:
+        json.dump(results, f)
+
+
+# --- DRIVER ---
+
+def stub_delta(before, after):
+    return {
+        "requests": {s: after["requests"][s] - before["requests"][s] for s in after["requests"]},
+        "rate_limited": {s: after["rate_limited"][s] - before["rate_limited"][s] for s in after["rate_limited"]},
+        "not_modified": after["not_modified"] - before["not_modified"],
+        "streams_cut": after["streams_cut"] - before["streams_cut"],
+    }
+
+
+def print_target(target, result):
+    print(f"\n=== {target} ===")
+    for run in result["runs"]:
+        rss = f"{run['peak_rss_mb']:.1f} MB" if run["peak_rss_mb"] is not None else "n/a"
+        label = "cold" if run["run"] == 1 else "warm"
+        print(f"run {run['run']} ({label}): {run['wall']:.2f}s wall, {run['jobs']} jobs,"
+              f" {run['jobs_per_sec']:.1f} jobs/s, peak RSS {rss}")
+        for stage, numbers in run["stages"].items():
+            mean = numbers["busy"] / numbers["calls"] * 1000 if numbers["calls"] else 0.0
+            print(f"  {stage:<15}{numbers['calls']:>7} calls {numbers['busy']:>9.3f}s busy {mean:>9.2f} ms/call")
+    stubs = result["stubs"]
+    served = ", ".join(
+        f"{s} {n}" + (f" ({stubs['rate_limited'][s]} x 429)" if stubs["rate_limited"][s] else "")
+        for s, n in stubs["requests"].items() if n
+    )
+    extras = []
+    if stubs["not_modified"]:
+        extras.append(f"{stubs['not_modified']} not modified")
+    if stubs["streams_cut"]:
+        extras.append(f"{stubs['streams_cut']} LLM streams cut off")
+    print(f"stubs served: {served or 'nothing'}" + (f"; {', '.join(extras)}" if extras else ""))
+
+
+def compare(results, baseline, max_regression):
+    """Prints wall-time changes against a saved run; returns False if one exceeds max_regression %."""
+    print("\n=== vs baseline ===")
+    ok = True
+    for target, result in results.items():
+        old_runs = {run["run"]: run for run in baseline.get(target, {}).get("runs", [])}
+        for run in result["runs"]:
+            old = old_runs.get(run["run"])
+            if not old or not old["wall"]:
+                continue
+            change = (run["wall"] - old["wall"]) / old["wall"] * 100
+            flag = ""
+            if max_regression is not None and change > max_regression:
+                flag, ok = "  <-- REGRESSION", False
+            print(f"{target:<9} run {run['run']}: {old['wall']:.2f}s -> {run['wall']:.2f}s ({change:+.1f}%),"
+                  f" {old['jobs_per_sec']:.1f} -> {run['jobs_per_sec']:.1f} jobs/s{flag}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--targets", default="watcher,ai,linkedin,sweep")
+    parser.add_argument("--runs", type=int, default=2, help="runs per target (1 cold, then warm)")
+    parser.add_argument("--real-delays", action="store_true", help="keep production sleeps and pacing")
+    parser.add_argument("--env", action="append", default=[], metavar="KEY=VALUE", help="extra setting for the bots")
+    parser.add_argument("--keep-state", metavar="DIR", help="keep each target's state and logs under DIR")
+    parser.add_argument("--json", metavar="PATH", help="write the results here")
+    parser.add_argument("--baseline", metavar="PATH", help="results of an earlier --json run to compare against")
+    parser.add_argument("--max-regression", type=float, metavar="PCT",
+                        help="exit with status 1 if a wall time got this much slower than the baseline")
+    parser.add_argument("--timeout", type=float, default=600, help="seconds before a target is killed")
+    add_config_arguments(parser)
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    parser.add_argument("--stub-url", help=argparse.SUPPRESS)
+    parser.add_argument("--out", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        worker(args.worker, args.runs, args.stub_url, args.out)
+        return
+
+    targets = [t.strip() for t in args.targets.split(",") if t.strip()]
+    unknown = [t for t in targets if t not in TARGETS]
+    if unknown:
+        parser.error(f"unknown targets: {', '.join(unknown)} (choose from {', '.join(TARGETS)})")
+
+    server, stub_state = start_stub_server(config_from_args(args))
+    stub_url = f"http://127.0.0.1:{server.server_address[1]}"
+    env = dict(os.environ)
+    env.update({
+        "BOT_TOKEN": "bench",
+        "CHAT_ID": "1",
+        "OPENROUTER_API_KEY": "bench",
+        "OPENROUTER_BASE_URL": f"{stub_url}/api/v1",
+        "TELEGRAM_API_BASE": stub_url,
+    })
+    if not args.real_delays:
+        env.update(NO_DELAYS)
+    for setting in args.env:
+        key, _, value = setting.partition("=")
+        env[key] = value
+
+    results = {}
+    failed = False
+    for target in targets:
+        state_dir = os.path.join(args.keep_state, target) if args.keep_state else tempfile.mkdtemp(prefix=f"bench-{target}-")
+        os.makedirs(state_dir, exist_ok=True)
+        out_path = os.path.join(state_dir, "results.json")
+        before = stub_state.stats()
+        command = [sys.executable, os.path.abspath(__file__), "--worker", target, "--runs", str(args.runs),
+                   "--stub-url", stub_url, "--out", out_path]
+        try:
+            subprocess.run(command, cwd=state_dir, env=env, check=True, timeout=args.timeout)
+        except (subprocess.CalledProcessError, subprocess.TimeoutExpired) as e:
+            print(f"\n=== {target} === FAILED ({e}); logs in {state_dir}")
+            failed = True
+            continue
+        with open(out_path, "r") as f:
+            results[target] = {"runs": json.load(f), "stubs": stub_delta(before, stub_state.stats())}
+        print_target(target, results[target])
+        if not args.keep_state:
+            shutil.rmtree(state_dir, ignore_errors=True)
+
+    server.shutdown()
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=1)
+    if args.baseline:
+        with open(args.baseline, "r") as f:
+            if not compare(results, json.load(f), args.max_regression):
+                failed = True
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""Before/after parse-time comparison for extractors.py on saved pages.
+
+Usage: python bench/parse_bench.py [--runs N] [--fixtures DIR]
+
+DIR must contain englishjobs_listing.html, englishjobs_detail.html and
+linkedin_cards.html (save real pages over the bundled ones to bench live markup).
+"""
+import argparse
+import os
+import sys
+import time
+
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import extractors  # noqa: E402
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+# --- BEFORE: the full-document parses the bots used to do ---
+def old_englishjobs_listing(html):
+    soup = BeautifulSoup(html, "html.parser")
+    jobs = []
+    for job in soup.find_all("a", href=True):
+        if "/job/" in job["href"]:
+            href = job["href"]
+            link = href if href.startswith("http") else "https://englishjobs.fr" + href
+            jobs.append((link, job.get_text(strip=True)))
+    return jobs
+
+
+def old_englishjobs_detail(html):
+    soup = BeautifulSoup(html, "html.parser")
+    description_div = soup.find("div", class_="job-description")
+    if not description_div: description_div = soup.find("body")
+    return description_div.get_text(separator="\n", strip=True)
+
+
+def old_linkedin_cards(html):
+    soup = BeautifulSoup(html, "html.parser")
+    cards = []
+    for card in soup.find_all("li"):
+        try:
+            link_tag = card.find("a", class_="base-card__full-link")
+            if not link_tag: continue
+            date_tag = card.find("time")
+            cards.append({
+                "link": link_tag["href"].split("?")[0],
+                "title": card.find("h3", class_="base-search-card__title").text.strip(),
+                "company": card.find("h4", class_="base-search-card__subtitle").text.strip(),
+                "location": card.find("span", class_="job-search-card__location").text.strip(),
+                "date_posted": date_tag.text.strip() if date_tag else "Recently",
+            })
+        except Exception:
+            continue
+    return cards
+
+
+CASES = [
+    ("englishjobs_listing.html", old_englishjobs_listing, lambda html: list(extractors.englishjobs_listing(html))),
+    ("englishjobs_detail.html", old_englishjobs_detail, extractors.englishjobs_detail),
+    ("linkedin_cards.html", old_linkedin_cards, lambda html: list(extractors.linkedin_cards(html))),
+]
+
+
+def best_time(fn, html, runs):
+    best = float("inf")
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn(html)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--fixtures", default=FIXTURES_DIR)
+    args = parser.parse_args()
+
+    print(f"Parser used by extractors.py: {extractors.PARSER}")
+    print(f"{'page':<28}{'size':>9}{'before ms':>12}{'after ms':>11}{'speedup':>10}  records")
+    for filename, before, after in CASES:
+        path = os.path.join(args.fixtures, filename)
+        if not os.path.exists(path):
+            print(f"{filename:<28}  missing, skipped")
+            continue
+        with open(path, "r", encoding="utf-8") as f:
+            html = f.read()
+
+        old_result, new_result = before(html), after(html)
+        same = "same" if old_result == new_result else "DIFFERENT"
+        t_before = best_time(before, html, args.runs)
+        t_after = best_time(after, html, args.runs)
+        count = len(new_result) if isinstance(new_result, list) else 1
+        print(
+            f"{filename:<28}{len(html):>9}{t_before * 1000:>12.2f}{t_after * 1000:>11.2f}"
+            f"{t_before / t_after:>9.1f}x  {count} ({same})"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,327 @@
+"""Local stand-ins for every service the bots talk to, serving recorded fixture pages.
+
+Usage: python bench/stubs.py [--port N] [--llm-latency S] [--llm-429-every N] ...
+
+- englishjobs.fr: /jobs/<category> listings and /job/<id> details (ETag + 304 supported)
+- LinkedIn guest search: /jobs-guest/jobs/api/seeMoreJobPostings/search
+- OpenRouter: /api/v1/chat/completions (plain and streamed answers)
+- Telegram Bot API: /bot<token>/sendMessage and /bot<token>/editMessageText
+
+Job IDs in the fixtures are rewritten per category / search page, so every listing
+brings its own jobs, and each detail page mentions its ID (no two jobs share an LLM
+cache entry). Latency and 429s are configurable per service.
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+SERVICES = ("englishjobs", "linkedin", "llm", "telegram")
+
+ENGLISHJOBS_ID = re.compile(r"(?<=/job/)[0-9a-f]{13}|(?<=data-id=\")[0-9a-f]{13}|(?<=/account/save/)[0-9a-f]{13}")
+LINKEDIN_ID = re.compile(r"\b\d{10}\b")
+JOB_TITLE = re.compile(r"^JOB: (.*)$", re.MULTILINE)
+BATCH_JOB = re.compile(r"^### JOB (\d+):", re.MULTILINE)
+
+
+def digest(*parts):
+    return hashlib.sha1("|".join(parts).encode("utf-8")).hexdigest()
+
+
+class StubConfig:
+    """Knobs of the stub server; every service has its own latency and 429 rate."""
+
+    def __init__(self, latency=None, rate_limit_every=None, retry_after=1.0, linkedin_pages=2,
+                 llm_token_latency=0.0, report_words=120):
+        # Seconds added to every response, per service
+        self.latency = {service: 0.0 for service in SERVICES}
+        self.latency.update(latency or {})
+        # Every Nth request to a service gets a 429 (0 = never)
+        self.rate_limit_every = {service: 0 for service in SERVICES}
+        self.rate_limit_every.update(rate_limit_every or {})
+        self.retry_after = retry_after
+        # LinkedIn result pages per search before it runs dry
+        self.linkedin_pages = linkedin_pages
+        # Delay between streamed LLM chunks, and length of a full report
+        self.llm_token_latency = llm_token_latency
+        self.report_words = report_words
+
+
+class StubState:
+    def __init__(self, config, fixtures_dir):
+        self.config = config
+        self.lock = threading.Lock()
+        self.requests = {service: 0 for service in SERVICES}
+        self.rate_limited = {service: 0 for service in SERVICES}
+        self.not_modified = 0
+        self.streams_cut = 0
+        self.message_id = 0
+        self.fixtures = {}
+        for name in ("englishjobs_listing.html", "englishjobs_detail.html", "linkedin_cards.html"):
+            with open(os.path.join(fixtures_dir, name), "r", encoding="utf-8") as f:
+                self.fixtures[name] = f.read()
+
+    def count(self, service):
+        """Counts a request; True if this one should be answered with a 429."""
+        with self.lock:
+            self.requests[service] += 1
+            every = self.config.rate_limit_every.get(service) or 0
+            if every and self.requests[service] % every == 0:
+                self.rate_limited[service] += 1
+                return True
+            return False
+
+    def stats(self):
+        with self.lock:
+            return {
+                "requests": dict(self.requests),
+                "rate_limited": dict(self.rate_limited),
+                "not_modified": self.not_modified,
+                "streams_cut": self.streams_cut,
+            }
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; with Nagle on, keep-alive clients eat a 40ms delayed ACK
+    disable_nagle_algorithm = True
+    state = None  # set by start_stub_server
+
+    def log_message(self, *args):
+        pass
+
+    # --- plumbing ---
+
+    def _send(self, status, body, content_type="text/html; charset=utf-8", headers=None):
+        data = body.encode("utf-8") if isinstance(body, str) else body
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _json(self, status, payload, headers=None):
+        self._send(status, json.dumps(payload), "application/json", headers)
+
+    def _enter(self, service):
+        """Latency + request count; returns False (after answering 429) when rate limited."""
+        config = self.state.config
+        if config.latency.get(service):
+            time.sleep(config.latency[service])
+        if not self.state.count(service):
+            return True
+        retry_after = config.retry_after
+        if service == "telegram":
+            self._json(429, {"ok": False, "error_code": 429, "parameters": {"retry_after": retry_after}})
+        elif service == "llm":
+            self._json(429, {"error": {"message": "rate limited", "code": 429}}, {"Retry-After": str(retry_after)})
+        else:
+            self._send(429, "Too Many Requests")
+        return False
+
+    def _body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    # --- routes ---
+
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        if parts.path.startswith("/jobs/"):
+            self._englishjobs_listing(parts.path.rsplit("/", 1)[1])
+        elif parts.path.startswith("/job/"):
+            self._englishjobs_detail(parts.path.rsplit("/", 1)[1])
+        elif parts.path.endswith("/seeMoreJobPostings/search"):
+            self._linkedin_search(parse_qs(parts.query))
+        else:
+            self._send(404, "not found")
+
+    def do_POST(self):
+        path = urlsplit(self.path).path
+        if path.endswith("/chat/completions"):
+            self._chat_completion(self._body())
+        elif path.startswith("/bot"):
+            self._telegram(path.rsplit("/", 1)[1], self._body())
+        else:
+            self._send(404, "not found")
+
+    def _englishjobs_listing(self, category):
+        if not self._enter("englishjobs"):
+            return
+        html = ENGLISHJOBS_ID.sub(
+            lambda m: digest(category.lower(), m.group(0))[:13], self.state.fixtures["englishjobs_listing.html"]
+        )
+        etag = '"' + digest(html)[:16] + '"'
+        if self.headers.get("If-None-Match") == etag:
+            with self.state.lock:
+                self.state.not_modified += 1
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self._send(200, html, headers={"ETag": etag})
+
+    def _englishjobs_detail(self, job_id):
+        if not self._enter("englishjobs"):
+            return
+        html = self.state.fixtures["englishjobs_detail.html"].replace(
+            'job-description">', f'job-description"><p>Reference: {job_id}</p>', 1
+        )
+        self._send(200, html)
+
+    def _linkedin_search(self, query):
+        if not self._enter("linkedin"):
+            return
+        start = int((query.get("start") or ["0"])[0])
+        if start // 25 >= self.state.config.linkedin_pages:
+            self._send(200, "")  # past the last page LinkedIn answers with an empty fragment
+            return
+        key = f"{(query.get('keywords') or [''])[0]}|{(query.get('location') or [''])[0]}|{start}"
+        html = LINKEDIN_ID.sub(
+            lambda m: str(int(digest(key, m.group(0))[:12], 16) % 9_000_000_000 + 1_000_000_000),
+            self.state.fixtures["linkedin_cards.html"],
+        )
+        self._send(200, html)
+
+    def _chat_completion(self, request):
+        if not self._enter("llm"):
+            return
+        prompt = request["messages"][-1]["content"]
+        tail = prompt.split("TASK", 1)[-1]
+        if "ONLY a JSON array" in prompt:
+            ids = BATCH_JOB.findall(tail)
+            answer = json.dumps([
+                {"id": int(i), "score": int(digest(tail, i)[:4], 16) % 101, "reason": "Bench verdict."} for i in ids
+            ])
+        elif "ONLY a JSON object" in prompt:
+            answer = json.dumps({"score": int(digest(tail)[:4], 16) % 101, "reason": "Bench verdict."})
+        else:
+            answer = self._report(tail)
+        if request.get("stream"):
+            self._stream(answer, request.get("model", "bench"))
+            return
+        self._json(200, {
+            "id": "bench", "object": "chat.completion", "created": int(time.time()), "model": request.get("model", "bench"),
+            "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": answer}}],
+        })
+
+    def _report(self, tail):
+        title = (JOB_TITLE.findall(tail) or ["Job"])[-1]
+        score = int(digest(tail)[:4], 16) % 101
+        if score < 50:
+            header = f"❄️ **LOW MATCH: {score}%**\n**Role:** {title}\n🛑 **Reason:** Bench verdict."
+        else:
+            header = f"🔥 **MATCH SCORE: {score}%**\n**Role:** {title}\n💡 **Why:** Bench verdict."
+        filler = " ".join(f"word{i}" for i in range(self.state.config.report_words))
+        return f"{header}\n🏹 **Hook:** \"{filler}\""
+
+    def _stream(self, answer, model):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        def write(data):
+            self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+            self.wfile.flush()
+
+        try:
+            words = answer.split(" ")
+            for i, word in enumerate(words):
+                piece = word if i == len(words) - 1 else word + " "
+                chunk = {"id": "bench", "object": "chat.completion.chunk", "created": int(time.time()), "model": model,
+                         "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}]}
+                write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+                if self.state.config.llm_token_latency:
+                    time.sleep(self.state.config.llm_token_latency)
+            write(b"data: [DONE]\n\n")
+            self.wfile.write(b"0\r\n\r\n")
+            self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            # The client hung up mid-answer (early cut-off)
+            with self.state.lock:
+                self.state.streams_cut += 1
+            self.close_connection = True
+
+    def _telegram(self, method, payload):
+        if not self._enter("telegram"):
+            return
+        if method not in ("sendMessage", "editMessageText"):
+            self._json(404, {"ok": False, "description": "Not Found"})
+            return
+        if not payload.get("chat_id") or not payload.get("text"):
+            self._json(400, {"ok": False, "description": "Bad Request: message text is empty"})
+            return
+        with self.state.lock:
+            if method == "sendMessage":
+                self.state.message_id += 1
+            message_id = payload.get("message_id") or self.state.message_id
+        self._json(200, {"ok": True, "result": {"message_id": message_id}})
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Clients dropping keep-alive connections (or streams they cut off) are business as usual
+        if isinstance(sys.exc_info()[1], ConnectionError):
+            return
+        super().handle_error(request, client_address)
+
+
+def start_stub_server(config=None, port=0, fixtures_dir=FIXTURES_DIR):
+    """Starts the stubs on a background thread; returns (server, state). Base URL: http://127.0.0.1:<port>."""
+    state = StubState(config or StubConfig(), fixtures_dir)
+    handler = type("BoundStubHandler", (StubHandler,), {"state": state})
+    server = StubServer(("127.0.0.1", port), handler)
+    threading.Thread(target=server.serve_forever, name="bench-stubs", daemon=True).start()
+    return server, state
+
+
+def add_config_arguments(parser):
+    for service in SERVICES:
+        parser.add_argument(f"--{service}-latency", type=float, default=0.0, help=f"seconds per {service} response")
+        parser.add_argument(f"--{service}-429-every", type=int, default=0, help=f"answer every Nth {service} request with 429")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="Retry-After of the stubbed 429s")
+    parser.add_argument("--linkedin-pages", type=int, default=2, help="result pages per LinkedIn search")
+    parser.add_argument("--llm-token-latency", type=float, default=0.0, help="seconds between streamed LLM chunks")
+    parser.add_argument("--report-words", type=int, default=120, help="length of a full LLM report")
+
+
+def config_from_args(args):
+    return StubConfig(
+        latency={s: getattr(args, f"{s}_latency") for s in SERVICES},
+        rate_limit_every={s: getattr(args, f"{s}_429_every") for s in SERVICES},
+        retry_after=args.retry_after,
+        linkedin_pages=args.linkedin_pages,
+        llm_token_latency=args.llm_token_latency,
+        report_words=args.report_words,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8765)
+    add_config_arguments(parser)
+    args = parser.parse_args()
+    server, state = start_stub_server(config_from_args(args), args.port)
+    print(f"Stubs listening on http://127.0.0.1:{server.server_address[1]} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        print(json.dumps(state.stats(), indent=1))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+import os
+import random
+import signal
+import threading
+import time
+import traceback
+from datetime import datetime
+
+import http_client
+import seen_store
+import pipeline
+from resilience import deadline
+from dedup import shared_index
+
+# --- CONFIGURATION ---
+# Which jobs to run. "sweep" is the shared englishjobs sweep (watcher + AI agent in one
+# fetch); "watcher" and "ai" run those bots on their own instead.
+DAEMON_JOBS = os.environ.get("DAEMON_JOBS", "sweep,linkedin")
+# Seconds between runs of each job (same cadence as the cron workflows)
+INTERVALS = {
+    "sweep": float(os.environ.get("DAEMON_SWEEP_INTERVAL", "300")),
+    "watcher": float(os.environ.get("DAEMON_WATCHER_INTERVAL", "300")),
+    "ai": float(os.environ.get("DAEMON_AI_INTERVAL", "300")),
+    "linkedin": float(os.environ.get("DAEMON_LINKEDIN_INTERVAL", "14400")),
+}
+# Each wait is randomized by +/- this fraction so runs do not land on the same second
+DAEMON_JITTER = float(os.environ.get("DAEMON_JITTER", "0.1"))
+# How often in-memory state is written out in full
+CHECKPOINT_INTERVAL = float(os.environ.get("DAEMON_CHECKPOINT_INTERVAL", "900"))
+# How long shutdown waits for runs in progress to wrap up
+SHUTDOWN_TIMEOUT = float(os.environ.get("DAEMON_SHUTDOWN_TIMEOUT", "120"))
+
+
+def job_functions():
+    # Imported lazily: each bot module sets up its clients and caches on import
+    import main as watcher
+    import ai_job_agent
+    import linkedin
+    return {
+        "sweep": pipeline.main,
+        "watcher": watcher.main,
+        "ai": ai_job_agent.main,
+        "linkedin": linkedin.scrape_linkedin,
+    }
+
+
+def checkpoint():
+    """Writes every piece of warm state to disk."""
+    import ai_job_agent
+    import main as watcher
+    seen_store.checkpoint_all()
+    index = shared_index()
+    index.evict()
+    index.save()
+    if ai_job_agent.llm_cache is not None:
+        ai_job_agent.llm_cache.save()
+    watcher.page_cache.save()
+    ai_job_agent.page_cache.save()
+    print(f"💾 Checkpoint written at {datetime.now().strftime('%H:%M:%S')}.")
+
+
+def jittered(seconds):
+    return seconds * random.uniform(1 - DAEMON_JITTER, 1 + DAEMON_JITTER)
+
+
+def job_loop(name, fn, interval, stop):
+    # Small random offset so jobs started together do not hit the network at once
+    if stop.wait(random.uniform(0, min(30.0, interval * DAEMON_JITTER))):
+        return
+    while not stop.is_set():
+        started = time.monotonic()
+        print(f"▶️ [{name}] run started at {datetime.now().strftime('%H:%M:%S')}")
+        try:
+            fn()
+        except Exception:
+            # A failed run is retried on the next tick; it never takes the daemon down
+            print(f"❌ [{name}] run failed:")
+            traceback.print_exc()
+        elapsed = time.monotonic() - started
+        print(f"⏹️ [{name}] run took {elapsed:.1f}s.")
+        stop.wait(max(0.0, jittered(interval) - elapsed))
+
+
+def run():
+    names = [n.strip() for n in DAEMON_JOBS.split(",") if n.strip()]
+    functions = job_functions()
+    unknown = [n for n in names if n not in functions]
+    if unknown:
+        raise SystemExit(f"Unknown DAEMON_JOBS entries: {', '.join(unknown)} (choose from {', '.join(functions)})")
+
+    # Stores stay open between runs; compact ones are only written at checkpoints
+    seen_store.DEFER_WRITES = True
+    # RUN_BUDGET is for one-shot runs; here it would stop every job for good
+    deadline.cancel()
+    stop = pipeline.stop_requested
+
+    def request_stop(signum, _frame):
+        print(f"Received signal {signum}, finishing current runs...")
+        stop.set()
+
+    signal.signal(signal.SIGTERM, request_stop)
+    signal.signal(signal.SIGINT, request_stop)
+
+    threads = []
+    for name in names:
+        thread = threading.Thread(
+            target=job_loop, args=(name, functions[name], INTERVALS[name], stop), name=name, daemon=True
+        )
+        thread.start()
+        threads.append(thread)
+    print(f"--- DAEMON STARTED: {', '.join(f'{n} every {INTERVALS[n]:.0f}s' for n in names)} ---")
+
+    while not stop.wait(CHECKPOINT_INTERVAL):
+        try:
+            checkpoint()
+        except Exception as e:
+            print(f"Checkpoint failed: {e}")
+
+    shutdown_by = time.monotonic() + SHUTDOWN_TIMEOUT
+    for thread in threads:
+        thread.join(max(0.0, shutdown_by - time.monotonic()))
+    still_running = [t.name for t in threads if t.is_alive()]
+    if still_running:
+        print(f"Gave up waiting for: {', '.join(still_running)}.")
+    checkpoint()
+    http_client.close()
+    print("--- DAEMON STOPPED ---")
+
+
+if __name__ == "__main__":
+    run()
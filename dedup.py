@@ -0,0 +1,230 @@
+import hashlib
+import os
+import random
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from array import array
+
+# NumPy computes all 64 permutations in one vectorized step; the pure-Python path gives identical signatures
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# --- CONFIGURATION ---
+# Shared by all three bots so a posting alerted from one source is recognised on the others
+DEDUP_DB = os.environ.get("DEDUP_DB", "postings.db")
+# Estimated Jaccard similarity above which two postings are the same job
+DEDUP_THRESHOLD = float(os.environ.get("DEDUP_THRESHOLD", "0.7"))
+# Reposts show up within days; older fingerprints are dropped
+DEDUP_TTL_DAYS = float(os.environ.get("DEDUP_TTL_DAYS", "30"))
+# Only postings with a company get a fingerprint: a title alone cannot tell "Brand Manager
+# Paris" at one company from the same title at another.
+# englishjobs listings carry no company or city, so across sources a posting is also compared
+# on its title alone: stricter threshold, titles of at least MIN_TITLE_TOKENS words, only within
+# DEDUP_TITLE_DAYS, and only if exactly one posting of the other source fits. Such a match is
+# never certain; the alert still goes out, marked as a possible duplicate.
+DEDUP_TITLE_THRESHOLD = float(os.environ.get("DEDUP_TITLE_THRESHOLD", "0.9"))
+DEDUP_TITLE_DAYS = float(os.environ.get("DEDUP_TITLE_DAYS", "7"))
+MIN_TITLE_TOKENS = 3
+
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+SHINGLE_SIZE = 4
+MASK64 = (1 << 64) - 1
+
+# Multiply-shift hash family: h(x) = ((a * x + b) mod 2**64) >> 32, a odd.
+# Fixed seed: signatures are persisted and must stay comparable between runs.
+_rng = random.Random(20240601)
+PERMUTATIONS = [(_rng.getrandbits(64) | 1, _rng.getrandbits(64)) for _ in range(NUM_PERM)]
+if np is not None:
+    _PERM_A = np.array([a for a, _ in PERMUTATIONS], dtype=np.uint64)
+    _PERM_B = np.array([b for _, b in PERMUTATIONS], dtype=np.uint64)
+
+GENDER_TAGS = re.compile(r"\(?\b(?:h\s*/\s*f|f\s*/\s*h|m\s*/\s*f(?:\s*/\s*d)?|h\s*/\s*f\s*/\s*x|f\s*/\s*h\s*/\s*x)\b\)?")
+NON_WORD = re.compile(r"[^a-z0-9]+")
+STOPWORDS = {"a", "an", "the", "of", "and", "at", "in", "for", "de", "du", "des", "la", "le", "les", "et", "en"}
+
+
+def normalize(text):
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(ch for ch in text if not unicodedata.combining(ch)).lower()
+    text = GENDER_TAGS.sub(" ", text)
+    return [tok for tok in NON_WORD.split(text) if tok and tok not in STOPWORDS]
+
+
+def fingerprint_tokens(title, company="", location=""):
+    # Only the city is kept: LinkedIn says "Paris, Île-de-France, France", englishjobs says "Paris"
+    city = (location or "").split(",")[0]
+    return normalize(title) + normalize(company) + normalize(city)
+
+
+def minhash(tokens):
+    text = " ".join(tokens)
+    if len(text) <= SHINGLE_SIZE:
+        shingles = {text}
+    else:
+        shingles = {text[i:i + SHINGLE_SIZE] for i in range(len(text) - SHINGLE_SIZE + 1)}
+    hashed = [int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "big") for s in shingles]
+    if np is not None:
+        # uint64 arithmetic wraps mod 2**64, which is exactly the hash family
+        values = np.outer(_PERM_A, np.array(hashed, dtype=np.uint64)) + _PERM_B[:, None]
+        return array("Q", (values >> np.uint64(32)).min(axis=1).tolist())
+    return array("Q", (min([((a * x + b) & MASK64) >> 32 for x in hashed]) for a, b in PERMUTATIONS))
+
+
+def band_keys(signature):
+    keys = []
+    for band in range(BANDS):
+        chunk = signature[band * ROWS:(band + 1) * ROWS]
+        digest = hashlib.blake2b(band.to_bytes(1, "big") + chunk.tobytes(), digest_size=8).digest()
+        keys.append(int.from_bytes(digest, "big", signed=True))
+    return keys
+
+
+def similarity(sig_a, sig_b):
+    return sum(1 for x, y in zip(sig_a, sig_b) if x == y) / NUM_PERM
+
+
+class DedupIndex:
+    """MinHash/LSH index of posting fingerprints (normalized title, company, city).
+
+    A lookup is one indexed query over the LSH band keys plus a signature comparison
+    for the few candidates, so it stays sub-millisecond as history grows. Titles get an
+    index of their own for the cross-source title rule.
+    """
+
+    def __init__(self, path=DEDUP_DB, threshold=DEDUP_THRESHOLD, ttl_days=DEDUP_TTL_DAYS,
+                 title_threshold=DEDUP_TITLE_THRESHOLD, title_days=DEDUP_TITLE_DAYS):
+        self.threshold = threshold
+        self.title_threshold = title_threshold
+        self.title_days = title_days
+        self._lock = threading.RLock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS postings (job_id TEXT PRIMARY KEY, source TEXT, title TEXT,"
+            " signature BLOB, first_seen INTEGER NOT NULL)"
+        )
+        self.conn.execute("CREATE TABLE IF NOT EXISTS lsh (band_key INTEGER NOT NULL, job_id TEXT NOT NULL)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS lsh_band_key ON lsh (band_key)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS postings_first_seen ON postings (first_seen)")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS titles (job_id TEXT PRIMARY KEY, source TEXT, title TEXT,"
+            " signature BLOB, first_seen INTEGER NOT NULL)"
+        )
+        self.conn.execute("CREATE TABLE IF NOT EXISTS title_lsh (band_key INTEGER NOT NULL, job_id TEXT NOT NULL)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS title_lsh_band_key ON title_lsh (band_key)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS titles_first_seen ON titles (first_seen)")
+        self.ttl_days = ttl_days
+        self.evict()
+
+    def evict(self):
+        with self._lock:
+            if self.ttl_days:
+                cutoff = int(time.time() - self.ttl_days * 86400)
+                self.conn.execute(
+                    "DELETE FROM lsh WHERE job_id IN (SELECT job_id FROM postings WHERE first_seen < ?)", (cutoff,)
+                )
+                self.conn.execute("DELETE FROM postings WHERE first_seen < ?", (cutoff,))
+            # Titles are only compared within a few days, so they never need to stay long
+            cutoff = int(time.time() - max(self.title_days, 1) * 86400)
+            self.conn.execute(
+                "DELETE FROM title_lsh WHERE job_id IN (SELECT job_id FROM titles WHERE first_seen < ?)", (cutoff,)
+            )
+            self.conn.execute("DELETE FROM titles WHERE first_seen < ?", (cutoff,))
+            self.conn.commit()
+
+    def check_and_add(self, job_id, source, title, company="", location=""):
+        """Indexes the posting and returns (job_id, title, certain) of an earlier near-duplicate, or None.
+
+        certain is True for a fingerprint match (company on both sides) and False for a
+        title-only one: skip the former, only mention the latter.
+
+        Checking a posting again (the other sink of a shared sweep, the other bot's run) gives
+        the same answer as the first check: only postings indexed before it count.
+        """
+        tokens = fingerprint_tokens(title, company, location)
+        title_tokens = normalize(title)
+        with self._lock:
+            duplicate = by_title = None
+            if company and tokens:
+                duplicate = self._match_and_add("postings", "lsh", job_id, source, title, tokens, self.threshold)
+            if len(title_tokens) >= MIN_TITLE_TOKENS:
+                since = int(time.time() - self.title_days * 86400)
+                by_title = self._match_and_add(
+                    "titles", "title_lsh", job_id, source, title, title_tokens, self.title_threshold,
+                    other_source=True, since=since,
+                )
+        if duplicate:
+            return duplicate + (True,)
+        return by_title + (False,) if by_title else None
+
+    def _match_and_add(self, table, lsh_table, job_id, source, title, tokens, threshold, other_source=False, since=0):
+        """Looks tokens up in one index, then adds them to it.
+
+        other_source: only postings from another source count, and only when exactly one fits.
+        """
+        signature = minhash(tokens)
+        keys = band_keys(signature)
+        placeholders = ",".join("?" * len(keys))
+        query = (
+            f"SELECT DISTINCT p.job_id, p.title, p.signature FROM {lsh_table} l JOIN {table} p ON p.job_id = l.job_id"
+            f" WHERE l.band_key IN ({placeholders}) AND l.job_id != ? AND p.first_seen >= ?"
+        )
+        params = keys + [job_id, since]
+        # Already indexed: compare with what came before it, not with postings indexed since
+        # (in a shared sweep the watcher indexes a whole page before the AI sink checks it)
+        own = self.conn.execute(f"SELECT rowid FROM {table} WHERE job_id = ?", (job_id,)).fetchone()
+        if own:
+            query += " AND p.rowid < ?"
+            params.append(own[0])
+        if other_source:
+            query += " AND p.source != ?"
+            params.append(source)
+
+        matches = []
+        for other_id, other_title, blob in self.conn.execute(query, params).fetchall():
+            other = array("Q")
+            other.frombytes(blob)
+            if similarity(signature, other) >= threshold:
+                matches.append((other_id, other_title))
+                if not other_source:
+                    break
+        duplicate = matches[0] if len(matches) == 1 or (matches and not other_source) else None
+
+        cur = self.conn.execute(
+            f"INSERT OR IGNORE INTO {table} VALUES (?, ?, ?, ?, ?)",
+            (job_id, source, title, signature.tobytes(), int(time.time())),
+        )
+        if cur.rowcount:
+            self.conn.executemany(f"INSERT INTO {lsh_table} VALUES (?, ?)", ((key, job_id) for key in keys))
+        return duplicate
+
+    def save(self):
+        with self._lock:
+            self.conn.commit()
+
+    def close(self):
+        with self._lock:
+            self.conn.commit()
+            self.conn.close()
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def shared_index():
+    """The process-wide DedupIndex. Every writer to DEDUP_DB should use it: a second
+    connection would wait on the first one's open write transaction.
+    """
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = DedupIndex()
+        return _shared
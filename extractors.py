@@ -0,0 +1,100 @@
+import re
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+# lxml builds trees several times faster than html.parser; use it when it is installed
+try:
+    import lxml  # noqa: F401
+    PARSER = "lxml"
+except ImportError:
+    PARSER = "html.parser"
+
+ENGLISHJOBS_BASE = "https://englishjobs.fr"
+
+
+def class_pattern(*classes):
+    # While parsing, a strainer sees the raw (possibly multi-class) attribute, so match by word
+    return re.compile(r"(^|\s)(%s)(\s|$)" % "|".join(re.escape(cls) for cls in classes))
+
+
+# --- COMPILED RULES ---
+# Only the elements matched by these strainers are ever turned into a tree.
+ENGLISHJOBS_JOB_LINK = SoupStrainer("a", href=re.compile(r"/job/"))
+ENGLISHJOBS_DESCRIPTION = SoupStrainer("div", class_=class_pattern("job-description"))
+
+# (tag, class) -> field name for the LinkedIn guest search cards
+LINKEDIN_CARD_FIELDS = {
+    ("a", "base-card__full-link"): "link",
+    ("h3", "base-search-card__title"): "title",
+    ("h4", "base-search-card__subtitle"): "company",
+    ("span", "job-search-card__location"): "location",
+    ("time", "job-search-card__listdate"): "date_posted",
+    ("time", "job-search-card__listdate--new"): "date_posted",
+}
+# Keep just the field elements; every card starts with its full-link anchor
+LINKEDIN_CARD_PARTS = SoupStrainer(
+    sorted({tag for tag, _ in LINKEDIN_CARD_FIELDS}),
+    class_=class_pattern(*(cls for _, cls in LINKEDIN_CARD_FIELDS)),
+)
+LINKEDIN_REQUIRED_FIELDS = ("link", "title", "company", "location")
+
+
+def englishjobs_listing(html):
+    """Yields (link, title) for every job link on an englishjobs listing page."""
+    soup = BeautifulSoup(html, PARSER, parse_only=ENGLISHJOBS_JOB_LINK)
+    for a in soup.find_all("a"):
+        href = a["href"]
+        link = href if href.startswith("http") else ENGLISHJOBS_BASE + href
+        yield link, a.get_text(strip=True)
+
+
+def englishjobs_detail(html):
+    """Returns the description text of an englishjobs job page (whole body if the div is missing)."""
+    soup = BeautifulSoup(html, PARSER, parse_only=ENGLISHJOBS_DESCRIPTION)
+    description_div = soup.find("div")
+    if not description_div:
+        # Unknown layout: fall back to a full parse, like the old scraper did
+        description_div = BeautifulSoup(html, PARSER).find("body")
+    if not description_div:
+        return ""
+    return description_div.get_text(separator="\n", strip=True)
+
+
+def linkedin_cards(html):
+    """Yields one dict per LinkedIn guest search card (link, title, company, location, date_posted)."""
+    soup = BeautifulSoup(html, PARSER, parse_only=LINKEDIN_CARD_PARTS)
+    card = None
+    for tag in soup.find_all(True, recursive=False):
+        name = next(
+            (LINKEDIN_CARD_FIELDS[(tag.name, cls)] for cls in tag.get("class") or ()
+             if (tag.name, cls) in LINKEDIN_CARD_FIELDS),
+            None,
+        )
+        if name == "link":
+            if card is not None:
+                yield from _finish_card(card)
+            card = {"link": tag.get("href")}
+        elif name and card is not None and name not in card:
+            card[name] = tag.get_text(strip=True)
+    if card is not None:
+        yield from _finish_card(card)
+
+
+def _finish_card(card):
+    if not all(card.get(name) for name in LINKEDIN_REQUIRED_FIELDS):
+        return
+    card["link"] = card["link"].split("?")[0]
+    card.setdefault("date_posted", "Recently")
+    yield card
+
+
+# Site-specific extractors by name, so new sources can plug in their own rules
+EXTRACTORS = {
+    "englishjobs_listing": englishjobs_listing,
+    "englishjobs_detail": englishjobs_detail,
+    "linkedin_cards": linkedin_cards,
+}
+
+
+def extract(name, html):
+    return EXTRACTORS[name](html)
@@ -0,0 +1,62 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlsplit
+
+# --- CONFIGURATION ---
+# How many listing pages we fetch at the same time (across all hosts)
+MAX_WORKERS = int(os.environ.get("FETCH_MAX_WORKERS", "8"))
+# Never have more than this many requests in flight against one host
+PER_HOST_LIMIT = int(os.environ.get("FETCH_PER_HOST_LIMIT", "4"))
+# Politeness budget: minimum gap (seconds) between two request starts on one host
+PER_HOST_INTERVAL = float(os.environ.get("FETCH_PER_HOST_INTERVAL", "0.25"))
+
+
+class HostLimiter:
+    """Caps concurrency and request rate per host."""
+
+    def __init__(self, limit=PER_HOST_LIMIT, interval=PER_HOST_INTERVAL):
+        self.limit = max(1, limit)
+        self.interval = max(0.0, interval)
+        self._lock = threading.Lock()
+        self._slots = {}
+        self._next_start = {}
+
+    def _semaphore(self, host):
+        with self._lock:
+            if host not in self._slots:
+                self._slots[host] = threading.BoundedSemaphore(self.limit)
+            return self._slots[host]
+
+    def _wait_turn(self, host):
+        # Reserve the next start time for this host, then sleep until it arrives
+        with self._lock:
+            now = time.monotonic()
+            start_at = max(now, self._next_start.get(host, now))
+            self._next_start[host] = start_at + self.interval
+        delay = start_at - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+    def run(self, url, fn, *args):
+        host = urlsplit(url).netloc
+        with self._semaphore(host):
+            self._wait_turn(host)
+            return fn(*args)
+
+
+def fetch_all(targets, fetch_fn, limiter=None, max_workers=MAX_WORKERS):
+    """Calls fetch_fn(name, url) for every entry of targets concurrently.
+
+    Yields (name, result) pairs as soon as each fetch completes.
+    """
+    limiter = limiter or HostLimiter()
+    workers = max(1, min(max_workers, len(targets)))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(limiter.run, url, fetch_fn, name, url): name
+            for name, url in targets.items()
+        }
+        for future in as_completed(futures):
+            yield futures[future], future.result()
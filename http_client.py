@@ -0,0 +1,157 @@
+import os
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import metrics
+from llm_scheduler import retry_after_seconds
+from resilience import CircuitOpen, Hedger, backoff, breakers, deadline
+
+# httpx (with the h2 extra) gives us HTTP/2; plain requests is the fallback
+try:
+    import httpx
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# --- CONFIGURATION ---
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+    "Accept-Language": "en-US,en;q=0.9",
+}
+DEFAULT_TIMEOUT = float(os.environ.get("HTTP_TIMEOUT", "15"))
+# Retries (GET only) for connection errors, timeouts and 5xx answers, with jittered backoff
+# (never for 429/999, those are block signals the callers pace on)
+RETRIES = int(os.environ.get("HTTP_RETRIES", "2"))
+# Keep-alive connections kept open per host
+POOL_SIZE = int(os.environ.get("HTTP_POOL_SIZE", "16"))
+USE_HTTP2 = HTTP2_AVAILABLE and os.environ.get("HTTP2", "1") != "0"
+
+_client = None
+_lock = threading.Lock()
+
+
+def _build_requests_session():
+    session = requests.Session()
+    session.headers.update(DEFAULT_HEADERS)
+    # Retries happen in request() below, where they can see the circuit breaker and the run budget
+    adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE, max_retries=0)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def _build_httpx_client():
+    transport = httpx.HTTPTransport(http2=True)
+    return httpx.Client(
+        http2=True,
+        headers=DEFAULT_HEADERS,
+        timeout=DEFAULT_TIMEOUT,
+        limits=httpx.Limits(max_connections=POOL_SIZE * 4, max_keepalive_connections=POOL_SIZE),
+        transport=transport,
+        follow_redirects=True,
+    )
+
+
+def get_client():
+    """Returns the process-wide pooled client, creating it on first use."""
+    global _client
+    if _client is None:
+        with _lock:
+            if _client is None:
+                _client = _build_httpx_client() if USE_HTTP2 else _build_requests_session()
+    return _client
+
+
+def _record(url, r):
+    host = urlsplit(url).hostname or "?"
+    metrics.count("http_requests_total", host=host, status=r.status_code)
+    metrics.count("http_response_bytes_total", len(r.content), host=host)
+
+
+# Connection errors and timeouts from whichever client is in use
+TRANSIENT_ERRORS = (requests.ConnectionError, requests.Timeout)
+if HTTP2_AVAILABLE:
+    TRANSIENT_ERRORS += (httpx.TransportError,)
+
+hedger = Hedger(workers=POOL_SIZE * 2)
+
+
+def request(method, url, hedge=False, **kwargs):
+    """One request through the host's circuit breaker.
+
+    GETs are retried on connection errors, timeouts and 5xx with jittered backoff, as long
+    as the run budget allows. hedge=True races a second copy of a slow GET (HTTP_HEDGE_AFTER).
+    Raises CircuitOpen while the host is failing.
+    """
+    host = urlsplit(url).hostname or "?"
+    breaker = breakers.get(host)
+    attempts = 1 + max(0, RETRIES) if method == "get" else 1
+    timeout = kwargs.pop("timeout", DEFAULT_TIMEOUT)
+
+    def send():
+        return getattr(get_client(), method)(url, timeout=deadline.clamp(timeout), **kwargs)
+
+    for attempt in range(attempts):
+        try:
+            breaker.before()
+        except CircuitOpen:
+            metrics.count("circuit_open_total", host=host)
+            raise
+        try:
+            if hedge and method == "get":
+                r, hedged = hedger.call(send)
+                if hedged:
+                    metrics.count("http_hedged_total", host=host)
+            else:
+                r = send()
+        except TRANSIENT_ERRORS:
+            # No more retries once this failure opened the circuit
+            if breaker.failure() or attempt + 1 == attempts or not _retry_wait(attempt, host):
+                raise
+            continue
+        except BaseException:
+            # Bad URL, too many redirects, Ctrl-C...: says nothing about the host either way
+            breaker.release()
+            raise
+
+        if r.status_code < 500:
+            breaker.success()
+            if metrics.METRICS_ENABLED:
+                _record(url, r)
+            return r
+        opened = breaker.failure()
+        if opened or attempt + 1 == attempts or not _retry_wait(attempt, host, retry_after_seconds(r.headers)):
+            if metrics.METRICS_ENABLED:
+                _record(url, r)
+            return r
+
+
+def _retry_wait(attempt, host, retry_after=None):
+    """Sleeps before the next attempt; False when there is no time left for one."""
+    wait_for = backoff(attempt, retry_after)
+    if deadline.expired() or wait_for + DEFAULT_TIMEOUT > deadline.left():
+        return False
+    metrics.count("http_retries_total", host=host)
+    time.sleep(wait_for)
+    return True
+
+
+def get(url, **kwargs):
+    return request("get", url, **kwargs)
+
+
+def post(url, **kwargs):
+    return request("post", url, **kwargs)
+
+
+def close():
+    global _client
+    with _lock:
+        if _client is not None:
+            _client.close()
+            _client = None
@@ -0,0 +1,34 @@
+import re
+from urllib.parse import urlsplit
+
+# --- CANONICAL RULES ---
+# Every source reduces its job links to "<source>:<short id>", so cosmetic URL variants
+# (relative links, tracking query strings, a different slug, fr. vs www.) dedup together.
+ENGLISHJOBS_ID = re.compile(r"/job/([0-9A-Za-z]+)")
+LINKEDIN_VIEW_ID = re.compile(r"/jobs/view/(?:[^/?#]*-)?(\d+)")
+LINKEDIN_QUERY_ID = re.compile(r"[?&](?:currentJobId|jobId)=(\d+)")
+CANONICAL_ID = re.compile(r"^(?:ej|li|url):")
+
+
+def canonical_job_id(link):
+    """Returns the short, stable ID for a job link (idempotent on IDs it already returned)."""
+    link = link.strip()
+    if CANONICAL_ID.match(link):
+        return link
+
+    parts = urlsplit(link)
+    host = parts.netloc.lower()
+
+    if "linkedin.com" in host:
+        match = LINKEDIN_VIEW_ID.search(parts.path) or LINKEDIN_QUERY_ID.search(link)
+        if match:
+            return "li:" + match.group(1)
+
+    # englishjobs links show up both absolute and relative ("/job/...")
+    if not host or host.endswith("englishjobs.fr"):
+        match = ENGLISHJOBS_ID.search(parts.path)
+        if match:
+            return "ej:" + match.group(1)
+
+    # Unknown source: drop scheme, query and fragment, keep host + path
+    return "url:" + host.removeprefix("www.") + parts.path.rstrip("/")
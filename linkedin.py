@@ -1,10 +1,18 @@
-import requests
-from bs4 import BeautifulSoup
-import json
 import os
 import time
-import random
 from datetime import datetime
+from urllib.parse import quote, urlencode
+import http_client
+import metrics
+from extractors import linkedin_cards
+from seen_store import open_seen_store
+from dedup import shared_index
+from notifier import TelegramNotifier
+from pacing import PacingController, SweepCursor
+from query_planner import QueryPlanner
+from pipeline import Sink, posting, run_pipeline, stop_requested
+from resilience import CircuitOpen
+from profiles import DEFAULT_PROFILE_NAME, Profile, load_profiles, merged_keywords
 
 # --- CONFIGURATION ---
 LOCATIONS = ["France"]
@@ -54,123 +62,289 @@ KEYWORDS = [
     "English Speaking Marketing",
     "Native English Marketing"
 ]
-STATE_FILE = "seen_linkedin.json"
+STATE_FILE = "seen_linkedin"  # seen_linkedin.db (or seen_linkedin.bin with SEEN_BACKEND=compact)
+LEGACY_STATE_FILE = "seen_linkedin.json"  # imported into STATE_FILE on first run
+# Where the last sweep stopped (and how fast it was going), so a blocked run resumes there
+CURSOR_FILE = "linkedin_cursor.json"
+
+SEARCH_API = "https://www.linkedin.com/jobs-guest/jobs/api/seeMoreJobPostings/search"
+# Pages are walked start=0,25,50... until one holds nothing new; this caps the walk
+PAGE_SIZE = 25
+MAX_PAGES = int(os.environ.get("LINKEDIN_MAX_PAGES", "5"))
+# Ask LinkedIn only for postings newer than the last completed check of a search
+# (plus this margin); older gaps than MAX_FILTER_AGE get the unfiltered search
+USE_TIME_FILTER = os.environ.get("LINKEDIN_TIME_FILTER", "1") != "0"
+TIME_FILTER_MARGIN = 3600
+MAX_FILTER_AGE = 30 * 86400
 
 # Secrets
 BOT_TOKEN = os.environ.get("BOT_TOKEN")
 CHAT_ID = os.environ.get("CHAT_ID")
 
-def send_telegram(message):
-    if not BOT_TOKEN or not CHAT_ID:
-        print("Error: Secrets missing.")
-        return
-    url = f"https://api.telegram.org/bot{BOT_TOKEN}/sendMessage"
-    payload = {"chat_id": CHAT_ID, "text": message, "parse_mode": "HTML"}
-    try:
-        requests.post(url, json=payload, timeout=10)
-    except Exception as e:
-        print(f"Failed to send message: {e}")
-
-def load_seen_jobs():
-    if not os.path.exists(STATE_FILE):
-        return set()
-    try:
-        with open(STATE_FILE, "r") as f:
-            return set(json.load(f))
-    except:
-        return set()
+# Alerts are queued and sent as digests; undelivered ones are retried next run
+PENDING_ALERTS_FILE = "pending_alerts_linkedin.json"
+notifier = TelegramNotifier(BOT_TOKEN, CHAT_ID, "HTML", PENDING_ALERTS_FILE)
+
+# KEYWORDS are the built-in candidate's; profiles/*.json add their own searches and chats
+# (see profiles.py). Every search runs once and its results go to the profiles that asked for it.
+DEFAULT_PROFILE = Profile(DEFAULT_PROFILE_NAME, CHAT_ID, keywords=KEYWORDS)
+PROFILES = load_profiles(DEFAULT_PROFILE)
+notifiers = {DEFAULT_PROFILE_NAME: notifier}
+for profile in PROFILES[1:]:
+    notifiers[profile.name] = TelegramNotifier(BOT_TOKEN, profile.chat_id, "HTML", profile.file_name(PENDING_ALERTS_FILE))
+
+def send_telegram(message, profile=DEFAULT_PROFILE):
+    notifiers[profile.name].send(message)
+
+def load_seen_jobs(profile=DEFAULT_PROFILE):
+    # One store per profile (seen_linkedin_alice.db): a posting one candidate got is still news to another
+    if profile.is_default:
+        return open_seen_store(STATE_FILE, legacy_json=LEGACY_STATE_FILE)
+    return open_seen_store(profile.file_name(STATE_FILE))
+
+def recipients(keyword=None):
+    """Profiles whose searches include keyword (all of them for None)."""
+    return [profile for profile in PROFILES if keyword is None or keyword in profile.keywords]
 
 def save_seen_jobs(jobs):
-    with open(STATE_FILE, "w") as f:
-        json.dump(list(jobs), f)
+    jobs.save()
+
+def search_url(keyword, loc, start=0, posted_within=None):
+    # sortBy=DD (newest first) is what makes "stop at the first page with nothing new" safe
+    params = {"keywords": keyword, "location": loc, "sortBy": "DD", "start": start}
+    if posted_within:
+        params["f_TPR"] = f"r{posted_within}"
+    return f"{SEARCH_API}?{urlencode(params, quote_via=quote)}"
+
+def posted_within(last_checked):
+    """Seconds for the f_TPR filter, or None to search without it."""
+    if not USE_TIME_FILTER or not last_checked:
+        return None
+    gap = int(time.time() - last_checked) + TIME_FILTER_MARGIN
+    return gap if gap < MAX_FILTER_AGE else None
+
+def fetch_search_page(url, pacing):
+    """Fetches one results page under the pacing controller.
+
+    Returns (response, None), (None, None) on a connection error, or (None, status)
+    once LinkedIn keeps blocking past the pacing limit. Raises CircuitOpen while the
+    breaker keeps LinkedIn off limits.
+    """
+    while True:
+        with metrics.timer("pacing wait"):
+            pacing.wait()
+        try:
+            with metrics.timer("linkedin fetch"):
+                r = http_client.get(url)
+        except CircuitOpen:
+            raise
+        except Exception as e:
+            print(f"Connection Error: {e}")
+            return None, None
+
+        # Check for Blocks: back off hard and retry, give up once the wait gets absurd
+        if r.status_code == 429 or r.status_code == 999:
+            print(f"⚠️ Blocked by LinkedIn (Status {r.status_code}).")
+            metrics.count("blocks_total", source="linkedin", status=r.status_code)
+            # (no back-off retries once a shutdown is pending: the wait would be cut short)
+            if pacing.on_blocked() and not stop_requested.is_set():
+                print(f"Backing off to {pacing.delay:.0f}s between searches.")
+                continue
+            return None, r.status_code
+        pacing.on_success()
+        return r, None
+
+class LinkedInSource:
+    """Paced, resumable, planner-ordered sweep over the LinkedIn guest search API."""
+
+    name = "linkedin"
+
+    def __init__(self, locations=None, keywords=None, cursor_file=CURSOR_FILE):
+        locations = locations or LOCATIONS
+        keywords = keywords or merged_keywords(PROFILES)
+        self.cursor = SweepCursor(cursor_file)
+        self.pacing = PacingController(self.cursor.delay, interrupt=stop_requested)
+        # Most productive searches first; ones other searches already cover are skipped
+        self.planner = QueryPlanner()
+        queries = [(loc, keyword) for loc in locations for keyword in keywords]
+        # A search may only be merged into one whose results reach the same profiles
+        owners = {(loc, keyword): {profile.name for profile in recipients(keyword)} for loc, keyword in queries}
+        plan, self.skipped = self.planner.plan(queries, owners)
+        for (loc, keyword), reason in self.skipped:
+            print(f"Skipping search {keyword} in {loc}: {reason}.")
+        self.searches = self.cursor.order(plan)
+        self.resuming = self.cursor.position is not None
+        self.checked_count = 0
+        self.pages_fetched = 0
+        self.blocked = None
+
+    def sweep(self, is_new):
+        cursor, pacing, planner = self.cursor, self.pacing, self.planner
+        # The first search the circuit breaker cut short: the cursor stays there from then on,
+        # so the next run starts with it
+        short_circuited = None
+        for loc, keyword in self.searches:
+            print(f"Checking: {keyword} in {loc}...")
+            self.checked_count += 1
+            start = cursor.start_page(loc, keyword)
+            within = posted_within(cursor.last_checked(loc, keyword))
+            r = None
+            search_ids = []
+            search_new = 0
+            search_pages = 0
+
+            while start < MAX_PAGES * PAGE_SIZE:
+                # Everything before this page is done (sinks commit after each page); a killed run picks up here
+                if short_circuited is None:
+                    cursor.mark(loc, keyword, start)
+                cursor.save(pacing.delay)
+
+                try:
+                    r, block_status = fetch_search_page(search_url(keyword, loc, start, within), pacing)
+                except CircuitOpen as e:
+                    print(f"Skipping {keyword}: {e}.")
+                    short_circuited = short_circuited or keyword
+                    r = None
+                    break
+                if block_status:
+                    planner.record_block(loc, keyword)
+                    self.blocked = (block_status, keyword)
+                    return
+                if r is None:
+                    break
+                self.pages_fetched += 1
+                search_pages += 1
+
+                with metrics.timer("linkedin parse"):
+                    postings = [
+                        posting(card["link"], card["title"], self.name, card["company"], card["location"], card["date_posted"])
+                        for card in linkedin_cards(r.text)
+                    ]
+                fresh = sum(1 for item in postings if is_new(item["job_id"], keyword))
+                search_ids.extend(item["job_id"] for item in postings)
+                search_new += fresh
+                yield keyword, postings
+
+                # Results are newest first: a page with nothing new means we have caught up
+                if not fresh:
+                    break
+                start += PAGE_SIZE
+            else:
+                print(f"Reached the {MAX_PAGES}-page limit for {keyword}.")
+
+            if r is not None:
+                cursor.completed(loc, keyword)
+                planner.record(loc, keyword, search_ids, search_new, search_pages)
+
+        if short_circuited:
+            print(f"LinkedIn was unreachable for part of the sweep; next run resumes at {short_circuited}.")
+            return
+        # Full sweep done: the next run starts from the top again
+        cursor.finish()
+
+    def consumed(self, keyword):
+        # The cursor already moves page by page (marked before each fetch)
+        pass
+
+    def save(self):
+        print(f"Fetched {self.pages_fetched} result pages for {self.checked_count} searches.")
+        self.cursor.save(self.pacing.delay)
+        self.planner.finish_run()
+        self.planner.save()
+        print(self.planner.report())
+
+
+class LinkedInAlertSink(Sink):
+    name = "linkedin"
+
+    def start(self):
+        self.seen = {profile.name: load_seen_jobs(profile) for profile in PROFILES}
+        self.dedup_index = shared_index()
+        self.new_jobs_count = 0
+
+    def is_new(self, job_id, keyword=None):
+        return any(job_id not in self.seen[profile.name] for profile in recipients(keyword))
+
+    def consume(self, keyword, postings):
+        for item in postings:
+            job_id, link = item["job_id"], item["link"]
+
+            # Everyone whose searches include this keyword and who has not had the posting yet
+            to = [profile for profile in recipients(keyword) if job_id not in self.seen[profile.name]]
+            if not to: continue
+            for profile in to:
+                self.seen[profile.name].add(job_id)
+
+            # Other keywords (or englishjobs) may already have surfaced this posting; a LinkedIn
+            # duplicate only counts for the profiles that were shown it, and a title-only match
+            # (englishjobs has no company to compare) only gets a mention in the alert
+            duplicate = self.dedup_index.check_and_add(
+                job_id, "linkedin", item["title"], item["company"], item["location"]
+            )
+            possible = duplicate and not duplicate[2]
+            if duplicate and not possible:
+                other_id = duplicate[0]
+                to = [p for p in to if other_id.startswith("li:") and other_id not in self.seen[p.name]]
+                if not to:
+                    print(f"Skipping {item['title']}: same posting as {duplicate[1]} ({other_id}).")
+                    continue
+
+            # Send Alert
+            for profile in to:
+                send_telegram(
+                    f"🔵 <b>New LinkedIn Job</b>\n\n"
+                    f"<b>{item['title']}</b>\n"
+                    f"🏢 {item['company']}\n"
+                    f"📍 {item['location']} ({item['date_posted']})\n"
+                    + (f"⚠️ Possibly the same job as {duplicate[1]} ({duplicate[0]})\n" if possible else "")
+                    + f"<a href='{link}'>Apply on LinkedIn</a>",
+                    profile,
+                )
+            self.new_jobs_count += 1
+        # Keep the seen stores in step with the sweep cursor
+        for seen_jobs in self.seen.values():
+            save_seen_jobs(seen_jobs)
+
+    def finish(self):
+        for seen_jobs in self.seen.values():
+            save_seen_jobs(seen_jobs)
+        self.dedup_index.save()
+
 
 def scrape_linkedin():
     start_time = datetime.now().strftime('%H:%M')
     print(f"--- LINKEDIN RUN STARTED AT {start_time} ---")
-    
+
+    source = LinkedInSource()
+    sink = LinkedInAlertSink()
+
     # Notify you that the long run has started
     send_telegram(
         f"⏳ **LinkedIn Scraper Started** at {start_time}\n"
-        f"Checking {len(KEYWORDS)} roles in France.\n"
-        f"Running slowly to avoid detection..."
+        f"Checking {len(source.searches)} roles in France"
+        + (f" ({len(source.skipped)} low-yield searches skipped)" if source.skipped else "")
+        + (f", resuming at {source.searches[0][1]}" if source.resuming and source.searches else "") + ".\n"
+        f"Pacing starts at {source.pacing.delay:.0f}s between searches."
     )
 
-    seen_jobs = load_seen_jobs()
-    new_jobs_count = 0
-    checked_count = 0
-    blocked = False
-
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-        "Accept-Language": "en-US,en;q=0.9"
-    }
-
-    for loc in LOCATIONS:
-        for keyword in KEYWORDS:
-            if blocked: break
-            
-            print(f"Checking: {keyword} in {loc}...")
-            checked_count += 1
-            
-            # Format URL
-            fmt_keyword = keyword.replace(" ", "%20")
-            url = f"https://www.linkedin.com/jobs-guest/jobs/api/seeMoreJobPostings/search?keywords={fmt_keyword}&location={loc}&start=0"
-            
-            try:
-                # SUPER SAFE MODE: Sleep for 15 to 45 seconds between every search.
-                # This makes the run take ~15 minutes, but guarantees safety.
-                sleep_time = random.uniform(15, 45)
-                time.sleep(sleep_time)
-                
-                r = requests.get(url, headers=headers, timeout=10)
-                
-                # Check for Blocks
-                if r.status_code == 429 or r.status_code == 999:
-                    print(f"⚠️ Blocked by LinkedIn (Status {r.status_code}).")
-                    send_telegram(f"⚠️ **LinkedIn Blocked the Bot** (Error {r.status_code}).\nStopping run early.")
-                    blocked = True
-                    break 
-                
-                soup = BeautifulSoup(r.text, 'html.parser')
-                job_cards = soup.find_all('li')
-                
-                for card in job_cards:
-                    try:
-                        link_tag = card.find('a', class_='base-card__full-link')
-                        if not link_tag: continue
-                        link = link_tag['href'].split('?')[0]
-                        job_id = link
-                        
-                        if job_id in seen_jobs: continue
-                        
-                        title = card.find('h3', class_='base-search-card__title').text.strip()
-                        company = card.find('h4', class_='base-search-card__subtitle').text.strip()
-                        location = card.find('span', class_='job-search-card__location').text.strip()
-                        date_tag = card.find('time')
-                        date_posted = date_tag.text.strip() if date_tag else "Recently"
-                        
-                        # Send Alert
-                        send_telegram(
-                            f"🔵 <b>New LinkedIn Job</b>\n\n"
-                            f"<b>{title}</b>\n"
-                            f"🏢 {company}\n"
-                            f"📍 {location} ({date_posted})\n"
-                            f"<a href='{link}'>Apply on LinkedIn</a>"
-                        )
-                        seen_jobs.add(job_id)
-                        new_jobs_count += 1
-                        
-                    except: continue
-
-            except Exception as e:
-                print(f"Connection Error: {e}")
+    summary = run_pipeline(source, [sink], "linkedin")
+    summary = f"\n{summary}" if summary else ""
 
     # Summary
-    if new_jobs_count > 0:
-        save_seen_jobs(seen_jobs)
-        send_telegram(f"✅ **Run Complete**\nFound {new_jobs_count} new jobs.")
-    elif not blocked:
-        send_telegram(f"✅ **Run Complete**\nChecked {checked_count} searches.\nNo new jobs found.")
+    if source.blocked:
+        status, keyword = source.blocked
+        send_telegram(
+            f"⚠️ **LinkedIn Blocked the Bot** (Error {status}).\n"
+            f"Stopping run early; next run resumes at {keyword}."
+        )
+    if sink.new_jobs_count > 0:
+        send_telegram(f"✅ **Run Complete**\nFound {sink.new_jobs_count} new jobs.{summary}")
+    elif not source.blocked:
+        send_telegram(f"✅ **Run Complete**\nChecked {source.checked_count} searches.\nNo new jobs found.{summary}")
+    elif summary:
+        send_telegram(summary.strip())
+    for profile_notifier in notifiers.values():
+        profile_notifier.flush()
 
 if __name__ == "__main__":
     scrape_linkedin()
@@ -0,0 +1,99 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+import metrics
+
+# --- CONFIGURATION ---
+LLM_CACHE_MAX_ENTRIES = int(os.environ.get("LLM_CACHE_MAX_ENTRIES", "5000"))
+LLM_CACHE_TTL_DAYS = float(os.environ.get("LLM_CACHE_TTL_DAYS", "30"))
+
+
+def cache_key(*parts):
+    """Hashes every input that shapes an LLM answer (job text, profile, prompt template, model...)."""
+    h = hashlib.sha256()
+    for part in parts:
+        data = part.encode("utf-8")
+        # Length-prefix each part so ("ab", "c") and ("a", "bc") never collide
+        h.update(len(data).to_bytes(8, "big"))
+        h.update(data)
+    return h.hexdigest()
+
+
+class LLMCache:
+    """Disk-backed memo of LLM answers with an in-memory front.
+
+    Entries expire after LLM_CACHE_TTL_DAYS and the least recently used ones are dropped
+    beyond LLM_CACHE_MAX_ENTRIES. hits / misses count lookups for the run summary.
+    """
+
+    def __init__(self, path, max_entries=LLM_CACHE_MAX_ENTRIES, ttl_days=LLM_CACHE_TTL_DAYS):
+        self.max_entries = max_entries
+        self.ttl_days = ttl_days
+        self.hits = 0
+        self.misses = 0
+        self.memory = {}
+        self._lock = threading.RLock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS answers (key TEXT PRIMARY KEY, answer TEXT NOT NULL,"
+            " created INTEGER NOT NULL, last_used INTEGER NOT NULL) WITHOUT ROWID"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS answers_last_used ON answers (last_used)")
+        self.evict()
+
+    def get(self, key):
+        with self._lock:
+            answer = self.memory.get(key)
+            if answer is None:
+                row = self.conn.execute("SELECT answer FROM answers WHERE key = ?", (key,)).fetchone()
+                if row:
+                    answer = self.memory[key] = row[0]
+            if answer is None:
+                self.misses += 1
+                metrics.count("llm_cache_total", result="miss")
+                return None
+            self.hits += 1
+            metrics.count("llm_cache_total", result="hit")
+            self.conn.execute("UPDATE answers SET last_used = ? WHERE key = ?", (int(time.time()), key))
+            return answer
+
+    def put(self, key, answer):
+        now = int(time.time())
+        with self._lock:
+            self.memory[key] = answer
+            self.conn.execute("INSERT OR REPLACE INTO answers VALUES (?, ?, ?, ?)", (key, answer, now, now))
+
+    def evict(self):
+        removed = 0
+        with self._lock:
+            if self.ttl_days:
+                cutoff = int(time.time() - self.ttl_days * 86400)
+                removed += self.conn.execute("DELETE FROM answers WHERE created < ?", (cutoff,)).rowcount
+            if self.max_entries:
+                removed += self.conn.execute(
+                    "DELETE FROM answers WHERE key NOT IN"
+                    " (SELECT key FROM answers ORDER BY last_used DESC LIMIT ?)",
+                    (self.max_entries,),
+                ).rowcount
+            self.conn.commit()
+            if removed:
+                # The front may hold evicted answers; it refills from disk on demand
+                self.memory.clear()
+        return removed
+
+    def stats(self):
+        total = self.hits + self.misses
+        rate = 100 * self.hits / total if total else 0
+        return f"LLM cache: {self.hits} hits / {self.misses} misses ({rate:.0f}% hit rate)"
+
+    def save(self):
+        self.evict()
+
+    def close(self):
+        with self._lock:
+            self.conn.commit()
+            self.conn.close()
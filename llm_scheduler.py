@@ -0,0 +1,170 @@
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from resilience import deadline
+
+# --- CONFIGURATION ---
+# How many LLM requests may be in flight at once
+AI_CONCURRENCY = int(os.environ.get("AI_CONCURRENCY", "4"))
+# Starting request rate; it is halved on every 429 and creeps back up while calls succeed
+AI_REQUESTS_PER_MINUTE = float(os.environ.get("AI_REQUESTS_PER_MINUTE", "20"))
+# Attempts per job (or batch of jobs) before giving up on it for this run
+AI_MAX_ATTEMPTS = int(os.environ.get("AI_MAX_ATTEMPTS", "4"))
+# Wait used after a 429 that carries no Retry-After header (doubles per attempt)
+DEFAULT_BACKOFF = 5.0
+# Runs a job may fail to get analyzed in before it is given up on (and marked seen)
+AI_RETRY_LIMIT = int(os.environ.get("AI_RETRY_LIMIT", "5"))
+
+
+class RateLimited(Exception):
+    """Raised by a worker when the provider answered 429."""
+
+    def __init__(self, retry_after=None):
+        super().__init__(f"rate limited (retry after {retry_after}s)")
+        self.retry_after = retry_after
+
+
+def retry_after_seconds(headers):
+    """Reads Retry-After (seconds form) from response headers, None if absent or unparsable."""
+    try:
+        return max(0.0, float(headers.get("retry-after")))
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    """Request-rate limiter that adapts to the provider (AIMD on the refill rate)."""
+
+    def __init__(self, per_minute=AI_REQUESTS_PER_MINUTE, burst=None):
+        self.max_rate = per_minute / 60.0
+        self.rate = self.max_rate
+        self.capacity = burst or max(1.0, AI_CONCURRENCY)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if now >= self.paused_until and self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = max(self.paused_until - now, (1 - self.tokens) / self.rate)
+            time.sleep(wait)
+
+    def on_success(self):
+        with self._lock:
+            # Additive increase: +1 request/minute per success, up to the configured rate
+            self.rate = min(self.max_rate, self.rate + 1 / 60.0)
+
+    def on_rate_limited(self, retry_after):
+        with self._lock:
+            # Multiplicative decrease, and nobody sends anything until the provider says so
+            self.rate = max(self.max_rate / 16, self.rate / 2)
+            self.tokens = 0
+            self.paused_until = max(self.paused_until, time.monotonic() + retry_after)
+
+
+# One bucket for every LLM request in the process. Callers take a token right before the
+# request itself (cache hits and page fetches cost nothing) and report success to it.
+rate_limit = TokenBucket()
+
+
+class AnalysisScheduler:
+    """Runs LLM work items concurrently; items that hit a 429 wait it out and are retried."""
+
+    def __init__(self, concurrency=AI_CONCURRENCY, max_attempts=AI_MAX_ATTEMPTS, bucket=None, stop=None):
+        self.concurrency = max(1, concurrency)
+        # Optional threading.Event: once set, items not started yet are given up on (as None)
+        self.stop = stop
+        self.bucket = bucket or rate_limit
+        self.max_attempts = max(1, max_attempts)
+        self.rate_limited = 0
+
+    def _call(self, worker, item):
+        for attempt in range(self.max_attempts):
+            if self.stop is not None and self.stop.is_set():
+                return None
+            try:
+                return worker(item)
+            except RateLimited as e:
+                self.rate_limited += 1
+                wait = e.retry_after if e.retry_after is not None else DEFAULT_BACKOFF * 2 ** attempt
+                if wait >= deadline.left():
+                    return None  # the pause would outlast the run budget
+                print(f"⏳ LLM rate limited, pausing {wait:.0f}s (attempt {attempt + 1}/{self.max_attempts}).")
+                self.bucket.on_rate_limited(wait)
+        return None
+
+    def run(self, items, worker):
+        """Calls worker(item) for every item; yields (item, result) as each one finishes.
+
+        result is None when the item was still rate limited after max_attempts.
+        """
+        if not items:
+            return
+        with ThreadPoolExecutor(max_workers=min(self.concurrency, len(items))) as pool:
+            futures = {pool.submit(self._call, worker, item): item for item in items}
+            for future in as_completed(futures):
+                yield futures[future], future.result()
+
+
+class RetryQueue:
+    """Jobs the LLM could not analyze this run, persisted so the next run tries again.
+
+    They stay out of the seen store until analyzed; one that fails AI_RETRY_LIMIT runs
+    in a row is given up on. With several profiles, only the ones the job failed for are
+    retried.
+    """
+
+    def __init__(self, path, limit=AI_RETRY_LIMIT):
+        self.path = path
+        self.limit = max(1, limit)
+        self.items = {}  # link -> {"title", "attempts", "since", "profiles"}
+        if os.path.exists(path):
+            try:
+                with open(path, "r") as f:
+                    self.items = json.load(f)
+            except Exception:
+                self.items = {}
+
+    def __contains__(self, link):
+        return link in self.items
+
+    def __len__(self):
+        return len(self.items)
+
+    def pending(self):
+        return [(entry["title"], link) for link, entry in self.items.items()]
+
+    def profiles(self, link):
+        """Names of the profiles the job still has to be analyzed for (None: all of them)."""
+        return self.items.get(link, {}).get("profiles")
+
+    def failed(self, title, link, profiles=None):
+        """Records a failed attempt; returns False once the job is out of attempts."""
+        entry = self.items.setdefault(link, {"title": title, "attempts": 0, "since": int(time.time())})
+        entry["attempts"] += 1
+        if profiles is not None:
+            entry["profiles"] = list(profiles)
+        if entry["attempts"] >= self.limit:
+            del self.items[link]
+            return False
+        return True
+
+    def done(self, link):
+        self.items.pop(link, None)
+
+    def save(self):
+        with open(self.path, "w") as f:
+            json.dump(self.items, f, indent=1)
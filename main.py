@@ -1,10 +1,10 @@
-import requests
-from bs4 import BeautifulSoup
-import json
 import os
 from datetime import datetime 
-import random
-import time
+from page_cache import PageCache
+from seen_store import open_seen_store
+from dedup import shared_index
+from pipeline import EnglishJobsSource, Sink, run_pipeline
+from notifier import TelegramNotifier
 
 # --- CONFIGURATION ---
 # UPDATED: A Dictionary of "Role Name" -> "URL"
@@ -22,113 +22,95 @@ SEARCH_URLS = {
     # Uncomment to add more
 }
 
-STATE_FILE = "seen_jobs.json"
+STATE_FILE = "seen_jobs"  # seen_jobs.db (or seen_jobs.bin with SEEN_BACKEND=compact)
+LEGACY_STATE_FILE = "seen_jobs.json"  # imported into STATE_FILE on first run
+# ETag / Last-Modified / body hash of every listing page, so unchanged pages are not re-parsed
+PAGE_CACHE_FILE = "page_cache.json"
+page_cache = PageCache(PAGE_CACHE_FILE)
 
 # Secrets
 BOT_TOKEN = os.environ.get("BOT_TOKEN")
 CHAT_ID = os.environ.get("CHAT_ID")
 
+# Alerts are queued and sent as digests; undelivered ones are retried next run
+PENDING_ALERTS_FILE = "pending_alerts.json"
+notifier = TelegramNotifier(BOT_TOKEN, CHAT_ID, "HTML", PENDING_ALERTS_FILE)
+
 def send_telegram(message):
-    if not BOT_TOKEN or not CHAT_ID:
-        print("Error: Bot token or Chat ID missing.")
-        return
-    url = f"https://api.telegram.org/bot{BOT_TOKEN}/sendMessage"
-    payload = {"chat_id": CHAT_ID, "text": message, "parse_mode": "HTML"}
-    try:
-        requests.post(url, json=payload, timeout=5)
-    except Exception as e:
-        print(f"Failed to send message: {e}")
+    notifier.send(message)
 
 def load_seen_jobs():
-    if not os.path.exists(STATE_FILE):
-        return set()
-    try:
-        with open(STATE_FILE, "r") as f:
-            return set(json.load(f))
-    except:
-        return set()
+    return open_seen_store(STATE_FILE, legacy_json=LEGACY_STATE_FILE)
 
 def save_seen_jobs(jobs):
-    with open(STATE_FILE, "w") as f:
-        json.dump(list(jobs), f)
-
-def fetch_jobs(category_name, url):
-    try:
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-            "Accept-Language": "en-US,en;q=0.9"
-        }
-        
-        print(f"Checking {category_name} jobs...")
-        r = requests.get(url, headers=headers, timeout=15)
-        
-        if r.status_code != 200:
-            print(f"Failed to load {category_name}. Status: {r.status_code}")
-            return []
-
-        soup = BeautifulSoup(r.text, "html.parser")
-        jobs = []
-        
-        for job in soup.find_all("a", href=True):
-            if "/job/" in job["href"]:
-                title = job.get_text(strip=True)
-                
-                if job["href"].startswith("http"):
-                    link = job["href"]
-                else:
-                    link = "https://englishjobs.fr" + job["href"]
-                
-                job_id = link 
-                
-                if not any(j[0] == job_id for j in jobs):
-                    jobs.append((job_id, title, link))
-            
-        print(f"Found {len(jobs)} total jobs in {category_name}.")
-        return jobs
-
-    except Exception as e:
-        print(f"Error fetching {category_name}: {e}")
-        return []
+    jobs.save()
 
-def main():
-    start_time = datetime.now().strftime('%H:%M')
-    print(f"--- JOB WATCHER RUN STARTED AT {start_time} ---")
-    
-    seen_jobs = load_seen_jobs()
-    total_new_found = 0
-    
-    for category, url in SEARCH_URLS.items():
-        # Safety Delay
-        time.sleep(random.uniform(3, 6))
-        
-        jobs = fetch_jobs(category, url)
+class PlainAlertSink(Sink):
+    """One Telegram alert per new job, per category."""
+
+    name = "watcher"
+
+    def __init__(self, dedup_index=None):
+        self.dedup_index = dedup_index
+
+    def start(self):
+        self.seen_jobs = load_seen_jobs()
+        self.dedup_index = self.dedup_index or shared_index()
+        self.total_new_found = 0
+
+    def is_new(self, job_id, category=None):
+        return job_id not in self.seen_jobs
+
+    def consume(self, category, postings):
+        if category not in SEARCH_URLS:
+            return  # another profile's category (shared sweep)
         category_new_count = 0
-        
-        for job_id, title, link in jobs:
-            if job_id not in seen_jobs:
-                seen_jobs.add(job_id)
+
+        for item in postings:
+            job_id, title, link = item["job_id"], item["title"], item["link"]
+            if job_id not in self.seen_jobs:
+                self.seen_jobs.add(job_id)
+                duplicate = self.dedup_index.check_and_add(job_id, "englishjobs", title)
+                if duplicate and duplicate[2]:
+                    print(f"Skipping {title}: same posting as {duplicate[1]} ({duplicate[0]}).")
+                    continue
                 send_telegram(
                     f"🎯 <b>New {category} Job</b>\n\n"
                     f"<b>{title}</b>\n"
-                    f"<a href='{link}'>View job</a>\n\n"
+                    + (f"⚠️ Possibly the same job as {duplicate[1]} ({duplicate[0]})\n" if duplicate else "")
+                    + f"<a href='{link}'>View job</a>\n\n"
                     f"⏰ {datetime.now().strftime('%Y-%m-%d %H:%M')}"
                 )
                 category_new_count += 1
-                total_new_found += 1
-        
+                self.total_new_found += 1
+
         if category_new_count > 0:
             print(f"Saved {category_new_count} new jobs for {category}.")
-            save_seen_jobs(seen_jobs)
-
-   # 4. Summary Log & "Heartbeat" Message
-    if total_new_found > 0:
-        print(f"✅ Run Complete. Sent {total_new_found} alerts.")
-        # Optional: Send a summary message after finding jobs
-        send_telegram(f"🏁 **Batch Complete**: Found {total_new_found} new jobs.")
-    else:
-        print("✅ Run Complete. No new jobs.")
-        # THIS IS THE LINE YOU WANT ENABLED:
-        send_telegram("✅ **Check Complete**: No new jobs found.")
+            save_seen_jobs(self.seen_jobs)
+
+    def finish(self):
+        save_seen_jobs(self.seen_jobs)
+        self.dedup_index.save()
+
+       # 4. Summary Log & "Heartbeat" Message
+        if self.total_new_found > 0:
+            print(f"✅ Run Complete. Sent {self.total_new_found} alerts.")
+            # Optional: Send a summary message after finding jobs
+            send_telegram(f"🏁 **Batch Complete**: Found {self.total_new_found} new jobs.")
+        else:
+            print("✅ Run Complete. No new jobs.")
+            # THIS IS THE LINE YOU WANT ENABLED:
+            send_telegram("✅ **Check Complete**: No new jobs found.")
+
+        notifier.flush()
+
+def main():
+    start_time = datetime.now().strftime('%H:%M')
+    print(f"--- JOB WATCHER RUN STARTED AT {start_time} ---")
+    summary = run_pipeline(EnglishJobsSource(SEARCH_URLS, page_cache), [PlainAlertSink()], "watcher")
+    if summary:
+        send_telegram(summary)
+        notifier.flush()
 
 if __name__ == "__main__":
     main()
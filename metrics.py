@@ -0,0 +1,286 @@
+import json
+import os
+import threading
+import time
+from contextlib import nullcontext
+from datetime import datetime
+
+# --- CONFIGURATION ---
+# Off by default; every hook below is a flag check and nothing else while it is off
+METRICS_ENABLED = os.environ.get("METRICS", "0") == "1"
+# One JSON object per run (what that run did), appended
+METRICS_LOG = os.environ.get("METRICS_LOG", "metrics.jsonl")
+# Directory watched by node_exporter's textfile collector; empty = no Prometheus file
+METRICS_TEXTFILE_DIR = os.environ.get("METRICS_TEXTFILE_DIR", "")
+# Latency histogram buckets, seconds
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+PREFIX = "jobbot_"
+# How many stages the end-of-run summary lists (the slowest, by total time)
+SUMMARY_STAGES = 5
+
+
+def _key(name, labels):
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _render(key):
+    name, labels = key
+    return name + ("{" + ",".join(f"{k}={v}" for k, v in labels) + "}" if labels else "")
+
+
+class Histogram:
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)  # last slot: above the largest bucket
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for i, bound in enumerate(BUCKETS):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.sum += value
+        self.count += 1
+
+    def copy(self):
+        other = Histogram()
+        other.counts, other.sum, other.count = list(self.counts), self.sum, self.count
+        return other
+
+    def minus(self, earlier):
+        delta = self.copy()
+        if earlier is not None:
+            delta.counts = [a - b for a, b in zip(self.counts, earlier.counts)]
+            delta.sum -= earlier.sum
+            delta.count -= earlier.count
+        return delta
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-quantile (inf past the last bucket)."""
+        if not self.count:
+            return 0.0
+        rank, seen = q * self.count, 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank:
+                return BUCKETS[i] if i < len(BUCKETS) else float("inf")
+        return float("inf")
+
+
+class Registry:
+    """Process-wide counters and latency histograms, keyed by name + labels.
+
+    Totals only ever grow (Prometheus counter semantics); a run's own numbers are the
+    difference between the snapshots taken at its start and its end.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = {}
+        self.histograms = {}
+
+    def count(self, name, n, labels):
+        key = _key(name, labels)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + n
+
+    def observe(self, name, value, labels):
+        key = _key(name, labels)
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram()
+            histogram.observe(value)
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self.counters), {key: h.copy() for key, h in self.histograms.items()}
+
+
+registry = Registry()
+_runs = {}  # run label -> (start time, snapshot)
+_runs_lock = threading.Lock()
+
+
+# --- HOOKS (cheap no-ops while disabled) ---
+
+def count(name, n=1, **labels):
+    if METRICS_ENABLED:
+        registry.count(name, n, labels)
+
+
+def observe(name, seconds, **labels):
+    if METRICS_ENABLED:
+        registry.observe(name, seconds, labels)
+
+
+class _StageTimer:
+    __slots__ = ("labels", "start")
+
+    def __init__(self, labels):
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        registry.observe("stage_seconds", time.perf_counter() - self.start, self.labels)
+        return False
+
+
+_NOT_TIMED = nullcontext()
+
+
+def timer(stage, **labels):
+    """with metrics.timer("listing fetch"): ... -- records into the stage_seconds histogram."""
+    if not METRICS_ENABLED:
+        return _NOT_TIMED
+    labels["stage"] = stage
+    return _StageTimer(labels)
+
+
+def timed(stage):
+    """Decorator form of timer(); hands back the function untouched while disabled."""
+    def decorate(fn):
+        if not METRICS_ENABLED:
+            return fn
+
+        def wrapper(*args, **kwargs):
+            with timer(stage):
+                return fn(*args, **kwargs)
+        wrapper.__name__, wrapper.__doc__ = fn.__name__, fn.__doc__
+        return wrapper
+    return decorate
+
+
+# --- RUNS ---
+
+def begin_run(label):
+    if METRICS_ENABLED:
+        with _runs_lock:
+            _runs[label] = (time.time(), registry.snapshot())
+
+
+def end_run(label):
+    """Writes the run to the JSONL log and the Prometheus textfile; returns a one-line summary.
+
+    Returns "" while disabled. In the daemon, runs that overlap in time see each other's
+    numbers too (the registry is process-wide).
+    """
+    if not METRICS_ENABLED:
+        return ""
+    with _runs_lock:
+        started, (counters0, histograms0) = _runs.pop(label, (time.time(), ({}, {})))
+    counters, histograms = registry.snapshot()
+    seconds = time.time() - started
+    run_counters = {key: n - counters0.get(key, 0) for key, n in counters.items() if n != counters0.get(key, 0)}
+    run_histograms = {
+        key: h.minus(histograms0.get(key)) for key, h in histograms.items()
+        if h.count != getattr(histograms0.get(key), "count", 0)
+    }
+
+    record = {
+        "ts": datetime.now().isoformat(timespec="seconds"),
+        "run": label,
+        "seconds": round(seconds, 3),
+        "counters": {_render(key): n for key, n in sorted(run_counters.items())},
+        "latency": {
+            _render(key): {
+                "count": h.count, "sum": round(h.sum, 4),
+                "p50": h.quantile(0.5), "p95": h.quantile(0.95), "p99": h.quantile(0.99),
+            }
+            for key, h in sorted(run_histograms.items())
+        },
+    }
+    try:
+        with open(METRICS_LOG, "a") as f:
+            f.write(json.dumps(record) + "\n")
+    except OSError as e:
+        print(f"Could not write {METRICS_LOG}: {e}")
+    if METRICS_TEXTFILE_DIR:
+        write_textfile(label, counters, histograms, started, seconds)
+    return summarize(seconds, run_counters, run_histograms)
+
+
+def _labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+def write_textfile(label, counters, histograms, started, seconds):
+    """Prometheus text format, one file per bot, replaced atomically."""
+    run = (("run", label),)
+    lines = []
+    for name in sorted({name for name, _ in counters}):
+        lines.append(f"# TYPE {PREFIX}{name} counter")
+        for (n, labels), value in sorted(counters.items()):
+            if n == name:
+                lines.append(f"{PREFIX}{name}{_labels(run + labels)} {value}")
+    for name in sorted({name for name, _ in histograms}):
+        lines.append(f"# TYPE {PREFIX}{name} histogram")
+        for (n, labels), h in sorted(histograms.items()):
+            if n != name:
+                continue
+            cumulative = 0
+            for bound, bucket in zip(BUCKETS + ("+Inf",), h.counts):
+                cumulative += bucket
+                lines.append(f"{PREFIX}{name}_bucket{_labels(run + labels, (('le', bound),))} {cumulative}")
+            lines.append(f"{PREFIX}{name}_sum{_labels(run + labels)} {h.sum:.6f}")
+            lines.append(f"{PREFIX}{name}_count{_labels(run + labels)} {h.count}")
+    lines.append(f"# TYPE {PREFIX}last_run_timestamp_seconds gauge")
+    lines.append(f"{PREFIX}last_run_timestamp_seconds{_labels(run)} {started + seconds:.0f}")
+    lines.append(f"# TYPE {PREFIX}last_run_duration_seconds gauge")
+    lines.append(f"{PREFIX}last_run_duration_seconds{_labels(run)} {seconds:.3f}")
+
+    path = os.path.join(METRICS_TEXTFILE_DIR, f"{PREFIX}{label.replace('+', '_')}.prom")
+    try:
+        with open(path + ".tmp", "w") as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(path + ".tmp", path)  # the collector never sees a half-written file
+    except OSError as e:
+        print(f"Could not write {path}: {e}")
+
+
+def _total(counters, name, **match):
+    return sum(
+        n for (key_name, labels), n in counters.items()
+        if key_name == name and all(dict(labels).get(k) == v for k, v in match.items())
+    )
+
+
+def _size(n):
+    return f"{n / 1e6:.1f} MB" if n >= 1e5 else f"{n / 1e3:.0f} kB"
+
+
+def summarize(seconds, counters, histograms):
+    """One plain-text line (safe in both HTML and Markdown messages)."""
+    stages = sorted(
+        ((dict(labels).get("stage", name), h) for (name, labels), h in histograms.items() if name == "stage_seconds"),
+        key=lambda item: -item[1].sum,
+    )[:SUMMARY_STAGES]
+    parts = [f"📊 Run stats ({seconds:.1f}s)"]
+    if stages:
+        parts.append(" · ".join(f"{stage} {h.count}x {h.sum:.1f}s (p95 {h.quantile(0.95):g}s)" for stage, h in stages))
+    received = _total(counters, "http_response_bytes_total")
+    if received:
+        parts.append(f"{_size(received)} downloaded")
+    tokens = _total(counters, "llm_tokens_total")
+    if tokens:
+        parts.append(f"{tokens / 1000:.1f}k LLM tokens")
+    hits, misses = _total(counters, "llm_cache_total", result="hit"), _total(counters, "llm_cache_total", result="miss")
+    if hits + misses:
+        parts.append(f"LLM cache {hits / (hits + misses):.0%} hits")
+    blocks = {}
+    for (name, labels), n in counters.items():
+        if name == "blocks_total":
+            source = dict(labels).get("source", "?")
+            blocks[source] = blocks.get(source, 0) + n
+    if blocks:
+        parts.append("blocks: " + ", ".join(f"{source} {n}" for source, n in sorted(blocks.items())))
+    return " | ".join(parts)
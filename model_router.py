@@ -0,0 +1,194 @@
+import os
+import threading
+import time
+
+from openai import APIConnectionError, APIStatusError, RateLimitError
+
+import metrics
+from llm_scheduler import RateLimited, rate_limit, retry_after_seconds
+from prompt_text import estimate_tokens
+
+# --- CONFIGURATION ---
+# Seconds before a hanging request counts as a timeout and the next model is tried
+AI_TIMEOUT = float(os.environ.get("AI_TIMEOUT", "60"))
+# How long a model that failed (429 without Retry-After, timeout, 5xx) is skipped
+MODEL_COOLDOWN = float(os.environ.get("AI_MODEL_COOLDOWN", "60"))
+EXTRA_HEADERS = {"HTTP-Referer": "https://github.com/vishaalgrizzly", "X-Title": "Job Hunter Bot"}
+
+
+def model_list(value):
+    """"a, b,c" -> ["a", "b", "c"] (for the comma separated model env vars)."""
+    return [m.strip() for m in value.split(",") if m.strip()]
+
+
+class ModelRouter:
+    """Ordered list of models for one kind of request, with failover.
+
+    Every request goes to the first model that is not cooling down. A model that is
+    rate limited, times out or fails server-side cools down for a while and the same
+    request moves on to the next one. RateLimited is only raised once every model is
+    rate limited, so the AnalysisScheduler waits for the first one to come back.
+    """
+
+    def __init__(self, client, models, name="llm"):
+        self.client = client
+        self.name = name  # labels this route in the metrics
+        self.models = list(dict.fromkeys(models))  # order kept, duplicates dropped
+        self.cooling = {}  # model -> time.monotonic() it may be used again
+        self.failovers = 0
+        self.answered = {}  # model -> answers this run, for the summary
+        self._lock = threading.Lock()
+
+    def _cool(self, model, seconds):
+        with self._lock:
+            self.cooling[model] = max(self.cooling.get(model, 0.0), time.monotonic() + seconds)
+            self.failovers += 1
+
+    def _available(self):
+        now = time.monotonic()
+        with self._lock:
+            return [m for m in self.models if self.cooling.get(m, 0.0) <= now]
+
+    def _next_ready(self):
+        now = time.monotonic()
+        with self._lock:
+            return max(1.0, min(self.cooling.get(m, now) for m in self.models) - now)
+
+    def _request(self, prompt, accept, **options):
+        """Sends prompt to the first model that takes it; returns (model, accept(response)).
+
+        accept returns None for a useless response (nothing in it), which moves on to the
+        next model like an error does. So does an error raised inside accept (a stream that
+        breaks off before its first piece).
+        """
+        rate_limited, last_error = False, None
+        # The token comes first: taking it waits out the pause the scheduler set after a 429,
+        # which is also when the models that caused it come off cooldown
+        rate_limit.acquire()
+        for i, model in enumerate(self._available()):
+            if i:
+                rate_limit.acquire()
+            reading = False  # past create(): errors now come from the answer itself
+            try:
+                with metrics.timer(f"llm {self.name}", model=model):
+                    response = self.client.chat.completions.create(
+                        model=model,
+                        messages=[{"role": "user", "content": prompt}],
+                        extra_headers=EXTRA_HEADERS,
+                        **options,
+                    )
+                reading = True
+                result = accept(response)
+            except RateLimitError as e:
+                wait = retry_after_seconds(e.response.headers)
+                self._cool(model, wait if wait is not None else MODEL_COOLDOWN)
+                print(f"↪️ {model} is rate limited, trying the next model.")
+                metrics.count("blocks_total", source="llm", model=model)
+                rate_limited = True
+                continue
+            except APIConnectionError as e:  # includes timeouts
+                self._cool(model, MODEL_COOLDOWN)
+                print(f"↪️ {model} timed out or is unreachable ({e.__class__.__name__}), trying the next model.")
+                last_error = e
+                continue
+            except APIStatusError as e:
+                if e.status_code < 500:
+                    raise  # our request is wrong; another model will not fix it
+                self._cool(model, MODEL_COOLDOWN)
+                print(f"↪️ {model} failed with {e.status_code}, trying the next model.")
+                last_error = e
+                continue
+            except Exception as e:
+                if not reading:
+                    raise
+                # The stream broke off (error event, dropped connection) before its first piece
+                self._cool(model, MODEL_COOLDOWN)
+                print(f"↪️ {model} broke off before answering ({e.__class__.__name__}), trying the next model.")
+                last_error = e
+                continue
+            rate_limit.on_success()
+            if result is None:
+                # Free models sometimes answer with nothing at all
+                print(f"↪️ {model} returned an empty answer, trying the next model.")
+                last_error = ValueError(f"empty answer from {model}")
+                continue
+            with self._lock:
+                self.answered[model] = self.answered.get(model, 0) + 1
+            return model, result
+
+        if rate_limited or last_error is None:
+            # Everything is rate limited (or cooling down after earlier failures)
+            raise RateLimited(self._next_ready())
+        raise last_error
+
+    def complete(self, prompt):
+        """Returns (model, answer) from the first model on the route that answers."""
+        def accept(completion):
+            answer = (completion.choices[0].message.content or "").strip() if completion.choices else ""
+            if answer:
+                count_tokens(completion.model, prompt, answer, completion.usage)
+            return answer or None
+        return self._request(prompt, accept)
+
+    def stream(self, prompt):
+        """Returns (model, generator of text pieces) as soon as a model starts answering.
+
+        Failover only happens before the first piece. Closing the generator closes the
+        connection, which stops the generation.
+        """
+        seen = {}  # filled in by _pieces: the answer so far and the usage chunk, if any
+
+        def accept(response):
+            seen.clear()
+            pieces = _pieces(response, seen)
+            try:
+                first = next(pieces, None)
+            except BaseException:
+                response.close()
+                raise
+            if first is None:
+                response.close()
+                return None
+            return _streamed(response, first, pieces, prompt, seen)
+        options = {"stream": True}
+        if metrics.METRICS_ENABLED:
+            options["stream_options"] = {"include_usage": True}
+        return self._request(prompt, accept, **options)
+
+    def stats(self):
+        used = ", ".join(f"{model} {count}" for model, count in self.answered.items()) or "none"
+        return f"answers by model: {used}; failovers: {self.failovers}"
+
+
+def count_tokens(model, prompt, answer, usage=None):
+    """Token usage for the metrics; estimated from the text when the API did not report it."""
+    if not metrics.METRICS_ENABLED:
+        return
+    if usage is not None:
+        prompt_tokens, answer_tokens = usage.prompt_tokens, usage.completion_tokens
+    else:
+        prompt_tokens, answer_tokens = estimate_tokens(prompt), estimate_tokens(answer)
+    metrics.count("llm_tokens_total", prompt_tokens, model=model, kind="prompt")
+    metrics.count("llm_tokens_total", answer_tokens, model=model, kind="completion")
+
+
+def _pieces(response, seen):
+    seen["text"] = ""
+    for chunk in response:
+        if getattr(chunk, "usage", None):
+            seen["usage"] = chunk.usage
+        seen.setdefault("model", chunk.model)
+        if chunk.choices and chunk.choices[0].delta.content:
+            seen["text"] += chunk.choices[0].delta.content
+            yield chunk.choices[0].delta.content
+
+
+def _streamed(response, first, pieces, prompt, seen):
+    try:
+        with metrics.timer("llm stream"):
+            yield first
+            yield from pieces
+    finally:
+        response.close()
+        # A stream cut off early never gets its usage chunk; the estimate covers what was read
+        count_tokens(seen.get("model", "?"), prompt, seen.get("text", ""), seen.get("usage"))
@@ -0,0 +1,255 @@
+import json
+import os
+import queue
+import threading
+import time
+
+import http_client
+import metrics
+from resilience import deadline
+
+# --- CONFIGURATION ---
+TELEGRAM_API_BASE = os.environ.get("TELEGRAM_API_BASE", "https://api.telegram.org")
+# Telegram rejects longer messages
+MAX_MESSAGE_CHARS = 4096
+# Telegram allows about one message per second per chat
+MIN_INTERVAL_PER_CHAT = float(os.environ.get("TELEGRAM_MIN_INTERVAL", "1.0"))
+# How long the sender waits for more alerts to pack into the same digest
+DIGEST_WINDOW = float(os.environ.get("TELEGRAM_DIGEST_WINDOW", "2.0"))
+MAX_ATTEMPTS = 5
+DIGEST_SEPARATOR = "\n\n➖➖➖➖➖\n\n"
+
+
+class ChatPace:
+    """Spaces out the messages to one chat.
+
+    Telegram's limit is per chat, and the watcher, the AI agent and LinkedIn may all post
+    to the same one (in the daemon, from one process), so every notifier for a chat shares
+    one ChatPace (see chat_pace).
+    """
+
+    def __init__(self):
+        self.last_send = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        with self._lock:
+            wait = self.last_send + MIN_INTERVAL_PER_CHAT - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+            self.last_send = time.monotonic()
+
+
+_paces = {}
+_paces_lock = threading.Lock()
+
+
+def chat_pace(chat_id):
+    with _paces_lock:
+        if chat_id not in _paces:
+            _paces[chat_id] = ChatPace()
+        return _paces[chat_id]
+
+
+def split_long(text, limit=MAX_MESSAGE_CHARS):
+    """Splits one oversized alert on line breaks so every part fits in a message."""
+    parts = []
+    while len(text) > limit:
+        cut = text.rfind("\n", 0, limit)
+        if cut <= 0:
+            cut = limit
+        parts.append(text[:cut])
+        text = text[cut:].lstrip("\n")
+    parts.append(text)
+    return parts
+
+
+def pack_digests(alerts, limit=MAX_MESSAGE_CHARS):
+    """Greedily packs alerts into as few messages as possible; returns a list of alert lists."""
+    digests, current, size = [], [], 0
+    for alert in alerts:
+        extra = len(alert) + (len(DIGEST_SEPARATOR) if current else 0)
+        if current and size + extra > limit:
+            digests.append(current)
+            current, size = [], 0
+            extra = len(alert)
+        current.append(alert)
+        size += extra
+    if current:
+        digests.append(current)
+    return digests
+
+
+class TelegramNotifier:
+    """Outbound Telegram queue: alerts are packed into digests and sent from a background thread.
+
+    send() never blocks on the network. Flood control (429 retry_after) is honored; alerts
+    that still fail are written to pending_file and re-sent by the next run. send_now() and
+    edit() skip the queue, for messages that are updated while they are being written.
+    """
+
+    def __init__(self, token, chat_id, parse_mode, pending_file):
+        self.token = token
+        self.chat_id = chat_id
+        self.parse_mode = parse_mode
+        self.pending_file = pending_file
+        self.sent = 0
+        self.failed = []
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        # Shared with every other notifier for this chat; live messages (send_now / edit)
+        # come from other threads than the digest sender
+        self._pace = chat_pace(str(chat_id))
+        # Whether pending_file's alerts are already in the queue (the file keeps them until flush)
+        self._pending_queued = False
+        self._load_pending()
+
+    def _load_pending(self):
+        self._pending_queued = True
+        if not self.token or not self.chat_id:
+            return
+        if not self.pending_file or not os.path.exists(self.pending_file):
+            return
+        try:
+            with open(self.pending_file, "r") as f:
+                pending = json.load(f)
+        except Exception:
+            pending = []
+        if pending:
+            print(f"Re-sending {len(pending)} alerts left over from the last run.")
+            for alert in pending:
+                self.send(alert)
+
+    def send(self, message):
+        if not self.token or not self.chat_id:
+            print("Error: Bot token or Chat ID missing.")
+            return
+        for part in split_long(message):
+            self._queue.put(part)
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="telegram-notifier", daemon=True)
+                self._thread.start()
+
+    def send_now(self, text):
+        """Sends one message right away, outside the digest queue. Returns its message_id, or None."""
+        if not self.token or not self.chat_id:
+            return None
+        status, result = self._message("sendMessage", text[:MAX_MESSAGE_CHARS])
+        return result.get("message_id") if status == "ok" else None
+
+    def edit(self, message_id, text):
+        """Replaces the text of a message sent with send_now(); True on success."""
+        status, _ = self._message("editMessageText", text[:MAX_MESSAGE_CHARS], message_id=message_id)
+        return status == "ok"
+
+    def _message(self, method, text, **fields):
+        status, result = self._call(method, self._payload(text, "default", **fields))
+        if status == "bad_request" and self.parse_mode:
+            # Half-written markup is often unbalanced; plain text always goes through
+            status, result = self._call(method, self._payload(text, None, **fields))
+        return status, result
+
+    def flush(self):
+        """Blocks until every queued alert is delivered or given up, then persists failures."""
+        # A notifier that outlives a run (daemon.py) retries the previous flush's failures
+        # here; overwriting the file without them would lose them
+        if not self._pending_queued:
+            self._load_pending()
+        self._queue.join()
+        with self._lock:
+            failed, self.failed = self.failed, []
+        # Without credentials nothing was loaded or sent: leave the file for a run that has them
+        if self.pending_file and self.token and self.chat_id:
+            with open(self.pending_file, "w") as f:
+                json.dump(failed, f)
+        self._pending_queued = False
+        if failed:
+            print(f"⚠️ {len(failed)} alerts could not be delivered; saved for the next run.")
+
+    def _run(self):
+        while True:
+            alerts = [self._queue.get()]
+            # Give the scraper a moment to queue more alerts into the same digest
+            digest_by = time.monotonic() + DIGEST_WINDOW
+            while True:
+                try:
+                    alerts.append(self._queue.get(timeout=max(0.001, digest_by - time.monotonic())))
+                except queue.Empty:
+                    break
+            for digest in pack_digests(alerts):
+                self._deliver(digest)
+            for _ in alerts:
+                self._queue.task_done()
+
+    def _deliver(self, digest):
+        status = self._post(DIGEST_SEPARATOR.join(digest))
+        if status == "ok":
+            self.sent += len(digest)
+        elif status == "bad_request" and len(digest) > 1:
+            # One alert with broken markup must not sink the whole digest
+            for alert in digest:
+                self._deliver([alert])
+        elif status == "bad_request" and self._post(digest[0], parse_mode=None) == "ok":
+            self.sent += 1
+        else:
+            with self._lock:
+                self.failed.extend(digest)
+
+    def _payload(self, text, parse_mode="default", **fields):
+        payload = {"chat_id": self.chat_id, "text": text, **fields}
+        parse_mode = self.parse_mode if parse_mode == "default" else parse_mode
+        if parse_mode:
+            payload["parse_mode"] = parse_mode
+        return payload
+
+    def _post(self, text, parse_mode="default"):
+        return self._call("sendMessage", self._payload(text, parse_mode))[0]
+
+    def _call(self, method, payload):
+        """Calls a Bot API method; returns (status, result) with status "ok", "bad_request" or "failed"."""
+        url = f"{TELEGRAM_API_BASE}/bot{self.token}/{method}"
+        for attempt in range(MAX_ATTEMPTS):
+            self._pace.wait()
+            try:
+                with metrics.timer("telegram"):
+                    r = http_client.post(url, json=payload)
+            except Exception as e:
+                metrics.count("telegram_requests_total", method=method, result="error")
+                print(f"Failed to send message: {e}")
+                if not _wait_within_budget(2 ** attempt):
+                    break
+                continue
+            metrics.count("telegram_requests_total", method=method, result=r.status_code)
+            if r.status_code == 200:
+                try:
+                    return "ok", r.json().get("result") or {}
+                except Exception:
+                    return "ok", {}
+            if r.status_code == 429:
+                try:
+                    retry_after = float(r.json().get("parameters", {}).get("retry_after", 1))
+                except Exception:
+                    retry_after = 2 ** attempt
+                print(f"Telegram flood control, waiting {retry_after:.0f}s.")
+                metrics.count("blocks_total", source="telegram")
+                if not _wait_within_budget(retry_after):
+                    break
+                continue
+            if r.status_code == 400:
+                print(f"Telegram rejected message: {r.text[:200]}")
+                return "bad_request", {}
+            print(f"Telegram error {r.status_code}, retrying.")
+            if not _wait_within_budget(2 ** attempt):
+                break
+        return "failed", {}
+
+
+def _wait_within_budget(seconds):
+    # Past the run budget the alert is better off in pending_file, for the next run
+    if seconds >= deadline.left():
+        print("No time left in this run to retry; keeping the alert for the next run.")
+        return False
+    time.sleep(seconds)
+    return True
@@ -0,0 +1,115 @@
+import json
+import os
+import random
+import time
+
+# --- CONFIGURATION ---
+# Gap between two requests while everything is healthy; the controller never goes below it
+PACING_MIN_DELAY = float(os.environ.get("PACING_MIN_DELAY", "4"))
+# Delay used by the first run (later runs start from the delay the last run ended on)
+PACING_START_DELAY = float(os.environ.get("PACING_START_DELAY", "15"))
+# Past this delay we stop for the day instead of waiting even longer
+PACING_MAX_DELAY = float(os.environ.get("PACING_MAX_DELAY", "300"))
+# Additive step: every healthy response shaves this much off the delay
+PACING_STEP = float(os.environ.get("PACING_STEP", "2"))
+# Multiplicative backoff on a block signal (429 / 999)
+PACING_BACKOFF = 4.0
+# Each wait is randomized by +/- this fraction so requests do not look machine-timed
+PACING_JITTER = 0.3
+
+
+class PacingController:
+    """AIMD pacing for one host: the delay shrinks by a fixed step while responses are
+    healthy and is multiplied on every block signal.
+    """
+
+    def __init__(self, delay=PACING_START_DELAY, min_delay=PACING_MIN_DELAY, max_delay=PACING_MAX_DELAY,
+                 interrupt=None):
+        self.min_delay = min_delay
+        # Optional threading.Event that cuts a wait short (shutdown)
+        self.interrupt = interrupt
+        self.max_delay = max_delay
+        self.delay = min(max(delay, min_delay), max_delay)
+        self.blocks = 0
+        self._last = None
+
+    def wait(self):
+        """Sleeps until the next request is due."""
+        if self._last is not None:
+            target = self.delay * random.uniform(1 - PACING_JITTER, 1 + PACING_JITTER)
+            remaining = self._last + target - time.monotonic()
+            if remaining > 0:
+                if self.interrupt is not None:
+                    self.interrupt.wait(remaining)
+                else:
+                    time.sleep(remaining)
+        self._last = time.monotonic()
+
+    def on_success(self):
+        self.delay = max(self.min_delay, self.delay - PACING_STEP)
+
+    def on_blocked(self):
+        """Backs off; returns False once the delay would exceed max_delay (time to give up)."""
+        self.blocks += 1
+        backed_off = max(self.delay, 1.0) * PACING_BACKOFF
+        self.delay = min(self.max_delay, backed_off)
+        return backed_off <= self.max_delay
+
+
+class SweepCursor:
+    """Where the last sweep stopped, persisted so the next run carries on from there.
+
+    Also keeps the pacing delay the run ended with, so a run that had to slow down does
+    not start the next one at full speed, and when each search last completed.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.position = None
+        self.delay = PACING_START_DELAY
+        self.checked = {}
+        if os.path.exists(path):
+            try:
+                with open(path, "r") as f:
+                    state = json.load(f)
+                self.position = state.get("position")
+                # Hours have passed since; start cautious, not at the backed-off extreme
+                self.delay = min(state.get("delay", self.delay), 2 * PACING_START_DELAY)
+                self.checked = state.get("checked", {})
+            except Exception:
+                pass
+
+    def order(self, items):
+        """Rotates items so the sweep starts at the saved position (or at the top)."""
+        items = list(items)
+        if self.position:
+            key = [self.position.get("location"), self.position.get("keyword")]
+            for i, item in enumerate(items):
+                if list(item) == key:
+                    return items[i:] + items[:i]
+        return items
+
+    def start_page(self, location, keyword):
+        """Result offset to resume a search at (non-zero only for the search a run stopped in)."""
+        if self.position and [self.position.get("location"), self.position.get("keyword")] == [location, keyword]:
+            return self.position.get("start", 0)
+        return 0
+
+    def last_checked(self, location, keyword):
+        """Unix time the search last ran to completion, None if never."""
+        return self.checked.get(f"{location}|{keyword}")
+
+    def completed(self, location, keyword):
+        self.checked[f"{location}|{keyword}"] = int(time.time())
+
+    def mark(self, location, keyword, start=0):
+        self.position = {"location": location, "keyword": keyword, "start": start}
+
+    def finish(self):
+        self.position = None
+
+    def save(self, delay=None):
+        if delay is not None:
+            self.delay = delay
+        with open(self.path, "w") as f:
+            json.dump({"position": self.position, "delay": self.delay, "checked": self.checked}, f)
@@ -0,0 +1,75 @@
+import hashlib
+import json
+import os
+import threading
+
+import http_client
+
+
+class PageCache:
+    """Per-URL validators (ETag, Last-Modified, body hash) persisted between runs.
+
+    Lets a bot skip parsing listing pages that have not changed since the last run.
+    A fetched page's validators are only kept once commit() says its jobs were handled;
+    otherwise a page dropped mid-run (cutoff, SIGTERM, a sink error) would count as
+    unchanged next time and its jobs would never be looked at. Validators only hit disk
+    on save(), so call it after the seen-jobs save.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self.entries = {}
+        self.fetched = {}  # url -> validators of a page fetched this run, not yet committed
+        if os.path.exists(path):
+            try:
+                with open(path, "r") as f:
+                    self.entries = json.load(f)
+            except Exception:
+                self.entries = {}
+
+    def request_headers(self, url):
+        entry = self.entries.get(url, {})
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def is_unchanged(self, url, response):
+        """Notes the response's validators and says whether the page is the same as last time."""
+        if response.status_code == 304:
+            return url in self.entries
+        if response.status_code != 200:
+            return False
+
+        body_hash = hashlib.sha256(response.content).hexdigest()
+        with self._lock:
+            previous = self.entries.get(url, {})
+            self.fetched[url] = {
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+                "hash": body_hash,
+            }
+        return previous.get("hash") == body_hash
+
+    def commit(self, urls):
+        """Keeps the validators of these pages: everything on them has been dealt with."""
+        with self._lock:
+            for url in urls:
+                if url in self.fetched:
+                    self.entries[url] = self.fetched.pop(url)
+
+    def save(self):
+        with self._lock:
+            with open(self.path, "w") as f:
+                json.dump(self.entries, f)
+
+
+def fetch_if_changed(url, cache):
+    """GETs url with conditional headers. Returns None when the page is unchanged."""
+    r = http_client.get(url, headers=cache.request_headers(url))
+    if cache.is_unchanged(url, r):
+        return None
+    return r
@@ -0,0 +1,230 @@
+import os
+import sys
+import threading
+from datetime import datetime
+
+import metrics
+from fetcher import fetch_all
+from page_cache import fetch_if_changed
+from extractors import englishjobs_listing
+from seen_store import open_seen_store
+from job_ids import canonical_job_id
+from profiles import merged_search_urls
+from resilience import deadline
+
+# `python pipeline.py` loads this file as __main__; the bots then import it as "pipeline".
+# One module under both names, or there would be two stop_requested events and two cutoff timers.
+if __name__ == "__main__":
+    sys.modules.setdefault("pipeline", sys.modules[__name__])
+
+# --- CONFIGURATION ---
+# Optional extra consumer of the shared sweep: one summary message per run listing every new job
+DIGEST_ENABLED = os.environ.get("DIGEST_SINK", "0") == "1"
+DIGEST_STATE_FILE = "seen_digest"
+
+# Set by daemon.py on SIGTERM, and when a one-shot run's RUN_BUDGET is nearly used up:
+# sweeps stop after the page in hand, and still save and report
+stop_requested = threading.Event()
+
+
+def _out_of_time():
+    print("⏰ Run budget nearly used up, finishing with what we have.")
+    stop_requested.set()
+
+
+deadline.on_cutoff(_out_of_time)
+
+
+def posting(link, title, source, company="", location="", date_posted=""):
+    """The job record every source produces and every sink consumes."""
+    return {
+        "job_id": canonical_job_id(link),
+        "source": source,
+        "link": link,
+        "title": title,
+        "company": company,
+        "location": location,
+        "date_posted": date_posted,
+    }
+
+
+# --- SOURCES ---
+# A source has sweep(is_new), yielding (category, [posting]) per page it fetched,
+# consumed(category), called once every sink has taken that page, and save() for its
+# own state. is_new(job_id, category) tells sources that page through results whether
+# any consumer still wants a posting from that category, so they can stop early.
+
+class EnglishJobsSource:
+    name = "englishjobs"
+
+    def __init__(self, search_urls, page_cache):
+        self.search_urls = search_urls
+        self.page_cache = page_cache
+        self.done = []  # categories every sink has consumed
+
+    def _fetch(self, category, url):
+        try:
+            print(f"Checking {category} jobs...")
+            with metrics.timer("listing fetch"):
+                r = fetch_if_changed(url, self.page_cache)
+            if r is None:
+                metrics.count("page_cache_total", result="unchanged")
+                print(f"{category} unchanged since last run.")
+                return []
+            metrics.count("page_cache_total", result="fetched")
+            if r.status_code != 200:
+                print(f"Failed to load {category}. Status: {r.status_code}")
+                return []
+
+            postings, found = [], set()
+            with metrics.timer("listing parse"):
+                for link, title in englishjobs_listing(r.text):
+                    item = posting(link, title, self.name)
+                    if item["job_id"] not in found:
+                        found.add(item["job_id"])
+                        postings.append(item)
+            print(f"Found {len(postings)} total jobs in {category}.")
+            return postings
+        except Exception as e:
+            print(f"Error fetching {category}: {e}")
+            return []
+
+    def sweep(self, is_new=None):
+        # All categories are fetched concurrently (politeness is handled per host by fetcher)
+        yield from fetch_all(self.search_urls, self._fetch)
+
+    def consumed(self, category):
+        self.done.append(category)
+
+    def save(self):
+        # Pages fetched but never consumed keep their old validators and are parsed again next run
+        self.page_cache.commit(self.search_urls[category] for category in self.done)
+        self.done = []
+        self.page_cache.save()
+
+
+# --- SINKS ---
+
+class Sink:
+    """Consumer of a sweep. Each sink keeps its own seen state and reporting."""
+
+    name = "sink"
+
+    def start(self):
+        pass
+
+    def is_new(self, job_id, category=None):
+        return True
+
+    def consume(self, category, postings):
+        pass
+
+    def finish(self):
+        pass
+
+
+class DigestSink(Sink):
+    """Collects the new postings of a sweep and sends them as one summary at the end."""
+
+    name = "digest"
+
+    def __init__(self, send, state_file=DIGEST_STATE_FILE):
+        self.send = send
+        self.state_file = state_file
+
+    def start(self):
+        self.seen_jobs = open_seen_store(self.state_file)
+        self.new = []
+
+    def is_new(self, job_id, category=None):
+        return job_id not in self.seen_jobs
+
+    def consume(self, category, postings):
+        for item in postings:
+            if item["job_id"] not in self.seen_jobs:
+                self.seen_jobs.add(item["job_id"])
+                self.new.append((category, item))
+
+    def finish(self):
+        self.seen_jobs.save()
+        if not self.new:
+            return
+        lines = [f"📰 <b>{len(self.new)} new jobs</b> ({datetime.now().strftime('%Y-%m-%d %H:%M')})"]
+        for category, item in self.new:
+            lines.append(f"• <a href='{item['link']}'>{item['title']}</a> ({category})")
+        self.send("\n".join(lines))
+
+
+def run_pipeline(source, sinks, label=None):
+    """Sweeps the source once and feeds every page to every sink.
+
+    Returns the run's metrics summary line ("" unless METRICS=1); label names the bot in
+    the metrics log and the Prometheus file.
+    """
+    label = label or source.name
+    metrics.begin_run(label)
+    for sink in sinks:
+        sink.start()
+
+    def is_new(job_id, category=None):
+        return any(sink.is_new(job_id, category) for sink in sinks)
+
+    for category, postings in source.sweep(is_new):
+        metrics.count("postings_total", len(postings), source=source.name)
+        failed = False
+        for sink in sinks:
+            try:
+                sink.consume(category, postings)
+            except Exception as e:
+                # One consumer failing must not cost the others their alerts
+                print(f"{sink.name} sink error on {category}: {e}")
+                failed = True
+        if not failed:
+            source.consumed(category)
+        if stop_requested.is_set():
+            print("Stop requested, ending the sweep early.")
+            break
+
+    finished = True
+    for sink in sinks:
+        try:
+            sink.finish()
+        except Exception as e:
+            print(f"{sink.name} sink error while finishing: {e}")
+            finished = False
+    # Only now: a source that remembered a page before its jobs were dealt with would skip them for good
+    if finished:
+        with metrics.timer("state save"):
+            source.save()
+    else:
+        print(f"Not saving the {source.name} state: its pages are read again next run.")
+    return metrics.end_run(label)
+
+
+def main():
+    # One englishjobs sweep for both bots (imported here: they import this module)
+    import main as watcher
+    import ai_job_agent
+
+    print(f"--- SHARED SWEEP STARTED AT {datetime.now().strftime('%H:%M')} ---")
+    # Both sinks write postings.db through dedup.shared_index()
+    sinks = [watcher.PlainAlertSink()]
+    if ai_job_agent.client:
+        sinks.append(ai_job_agent.AIAnalysisSink())
+    else:
+        print("OPENROUTER_API_KEY is missing; running without the AI agent.")
+    if DIGEST_ENABLED:
+        sinks.append(DigestSink(watcher.send_telegram))
+    # The AI agent's extra profiles may watch categories of their own; the watcher skips those
+    search_urls = dict(watcher.SEARCH_URLS)
+    if ai_job_agent.client:
+        for category, url in merged_search_urls(ai_job_agent.PROFILES).items():
+            search_urls.setdefault(category, url)
+    summary = run_pipeline(EnglishJobsSource(search_urls, watcher.page_cache), sinks, "sweep")
+    if summary:
+        watcher.send_telegram(summary)
+    watcher.notifier.flush()
+
+
+if __name__ == "__main__":
+    main()
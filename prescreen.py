@@ -0,0 +1,146 @@
+import os
+import re
+import zlib
+
+import numpy as np
+
+# --- CONFIGURATION ---
+# Jobs whose cosine similarity with a profile is below this never reach the LLM for it
+# (profiles can set their own prescreen_threshold).
+# Kept low on purpose: the pre-screen only drops obvious non-matches.
+PRESCREEN_THRESHOLD = float(os.environ.get("PRESCREEN_THRESHOLD", "0.02"))
+PRESCREEN_ENABLED = os.environ.get("PRESCREEN_ENABLED", "1") != "0"
+# Hashed feature space for word unigrams + bigrams
+N_FEATURES = 1 << 14
+
+TOKEN = re.compile(r"[a-zà-ÿ0-9+#.]+")
+
+# --- HARD RULES ---
+# The same calls the prompt's "LOW MATCH" branch makes, decided locally.
+PLUS_WORDS = re.compile(r"\b(plus|bonus|nice to have|appreciated|advantage|not required|optional|apprécié|atout)\b")
+FRENCH_REQUIRED = re.compile(
+    r"(native|fluent|bilingual|perfect|excellent|full professional)\s+(level\s+(of|in)\s+)?french"
+    r"|french\s*[(:\-]?\s*(native|mother tongue|fluent|bilingual|c1|c2|mandatory|required|essential)"
+    r"|(maîtrise|parfaite maîtrise)\s+(parfaite\s+)?(du|de la langue)\s+français"
+    r"|français\s+(courant|natif|exigé|obligatoire|indispensable)"
+    r"|langue maternelle\s+française"
+)
+WRONG_STACK = re.compile(
+    r"\b(java|c\+\+|c#|\.net|php|golang|ruby)\s+(developer|engineer|développeur|developpeur)\b"
+    r"|\b(developer|engineer|développeur|developpeur)\s+(java|c\+\+|c#|\.net|php|golang|ruby)\b"
+)
+# Generic postings from unrelated fields. Together with the profiles they fix the IDF once,
+# so a job's score never depends on which other jobs arrived in the same run.
+REFERENCE_POSTINGS = (
+    "Java developer to build backend services with Spring Boot, microservices, Kubernetes and SQL databases.",
+    "Registered nurse for our hospital ward, night shifts, patient care and medication rounds.",
+    "Financial controller: monthly closing, budgeting, IFRS reporting, audits and cash management.",
+    "Sales executive to grow our B2B accounts, prospecting, negotiation, CRM pipeline and quotas.",
+    "Warehouse operator: picking, packing, forklift license, inventory and logistics in a team.",
+    "Customer service agent answering calls and emails, solving client issues with empathy.",
+    "Mechanical engineer designing parts in CAD, testing prototypes and working with suppliers.",
+    "Legal counsel drafting contracts, GDPR compliance, corporate law and litigation support.",
+    "HR business partner for recruitment, onboarding, payroll and employee relations.",
+    "Data engineer building ETL pipelines with Python, Spark, Airflow and cloud data warehouses.",
+    "Nous recherchons un commercial pour développer le portefeuille clients de la région.",
+    "Teacher of English for adults, lesson planning, exams preparation and classroom management.",
+    "You will join our team and work with us on exciting projects. We offer a competitive salary, "
+    "remote days, health insurance and meal vouchers. Experience is required.",
+)
+FRENCH_STOPWORDS = {"le", "la", "les", "des", "et", "vous", "nous", "une", "est", "pour", "dans", "avec", "sur", "du", "au"}
+ENGLISH_STOPWORDS = {"the", "and", "you", "we", "is", "for", "with", "our", "to", "of", "in", "on", "a", "are", "will"}
+# Left out of the features: they match every posting and every profile alike
+STOPWORDS = FRENCH_STOPWORDS | ENGLISH_STOPWORDS | {"an", "as", "at", "be", "by", "or", "your", "this", "that", "de", "un", "à"}
+
+
+def profile_text(profile):
+    """Flattens the parts of USER_PROFILE that describe what the candidate can do."""
+    parts = []
+    for field in ("core_competencies", "tech_stack"):
+        for items in profile.get(field, {}).values():
+            parts.extend(items)
+    parts.extend(profile.get("languages", []))
+    parts.extend(profile.get("key_achievements", []))
+    return "\n".join(parts)
+
+
+def features(text):
+    words = [w for w in TOKEN.findall(text.lower()) if w not in STOPWORDS]
+    return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+
+def hashed_counts(texts):
+    """Rows of raw hashed unigram+bigram counts, one row per text."""
+    matrix = np.zeros((len(texts), N_FEATURES), dtype=np.float32)
+    for row, text in enumerate(texts):
+        for feature in features(text):
+            matrix[row, zlib.crc32(feature.encode("utf-8")) % N_FEATURES] += 1
+    return matrix
+
+
+def idf(counts):
+    """Smoothed IDF of every hashed feature over the rows of counts."""
+    df = np.count_nonzero(counts, axis=0)
+    return np.log((1 + counts.shape[0]) / (1 + df)) + 1
+
+
+def tfidf(counts, weights):
+    """Sublinear TF times a fixed IDF, L2-normalized."""
+    weighted = np.log1p(counts) * weights
+    norms = np.linalg.norm(weighted, axis=1, keepdims=True)
+    return weighted / np.where(norms == 0, 1, norms)
+
+
+def hard_rule(text):
+    """Returns a rejection reason if a rule settles the job, else None."""
+    lowered = text.lower()
+    for pattern, reason in ((FRENCH_REQUIRED, "Requires native/fluent French"), (WRONG_STACK, "Requires a developer stack (Java/.NET/...)")):
+        for match in pattern.finditer(lowered):
+            # "Fluent French is a plus" is not a requirement
+            if not PLUS_WORDS.search(lowered[match.end():match.end() + 40]):
+                return reason
+
+    words = TOKEN.findall(lowered)
+    french = sum(1 for w in words if w in FRENCH_STOPWORDS)
+    english = sum(1 for w in words if w in ENGLISH_STOPWORDS)
+    if len(words) > 80 and french > 2 * max(english, 1):
+        return "Posting is written in French"
+    return None
+
+
+class PreScreener:
+    """Scores a batch of job texts against every profile in one matrix product."""
+
+    def __init__(self, profiles, thresholds=None, hard_rules=None):
+        self.profile_texts = [profile_text(profile) for profile in profiles]
+        self.idf = idf(hashed_counts(self.profile_texts + list(REFERENCE_POSTINGS)))
+        self.profile_vectors = tfidf(hashed_counts(self.profile_texts), self.idf)
+        self.thresholds = np.asarray(thresholds or [PRESCREEN_THRESHOLD] * len(profiles), dtype=np.float32)
+        # Profiles the hard rules do not apply to (a candidate who speaks French, say)
+        self.hard_rules = list(hard_rules or [True] * len(profiles))
+
+    def scores(self, texts):
+        """jobs x profiles matrix of cosine similarities."""
+        return tfidf(hashed_counts(list(texts)), self.idf) @ self.profile_vectors.T
+
+    def screen(self, texts):
+        """Returns one row per text with a (score, reason) per profile.
+
+        reason is None when that job/profile pair should go to the LLM.
+        """
+        if not texts:
+            return []
+        scores = self.scores(texts)
+        too_low = scores < self.thresholds
+
+        results = []
+        for text, row, low in zip(texts, scores.tolist(), too_low.tolist()):
+            rule = hard_rule(text)  # once per job, whatever the number of profiles
+            verdicts = []
+            for score, below, strict in zip(row, low, self.hard_rules):
+                reason = rule if strict else None
+                if reason is None and below:
+                    reason = f"Low overlap with profile (score {score:.2f})"
+                verdicts.append((score, reason))
+            results.append(verdicts)
+        return results
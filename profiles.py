@@ -0,0 +1,140 @@
+import glob
+import json
+import os
+
+# --- CONFIGURATION ---
+# One JSON file per extra candidate; the bots' built-in profile is always the first one.
+#   {
+#     "chat_id": "123456",              (or "chat_id_env": "CHAT_ID_ALICE" to keep it in a secret)
+#     "profile": {...},                 same shape as USER_PROFILE in ai_job_agent.py
+#     "keywords": ["Data Analyst"],     LinkedIn searches whose results this candidate gets
+#     "search_urls": {"Data_Analyst": "https://englishjobs.fr/jobs/data_analyst"},
+#     "hook_skills": "SQL/Tableau dashboards",   what the report's hook should lean on
+#     "prescreen_threshold": 0.03, "escalate_score": 50, "cutoff_score": 60,
+#     "hard_rules": true                false for a candidate who does speak French / code Java
+#   }
+# Anything left out takes the built-in profile's value, except keywords and search_urls.
+PROFILES_DIR = os.environ.get("PROFILES_DIR", "profiles")
+DEFAULT_PROFILE_NAME = "default"
+# Settings a profile file may override; missing ones come from the built-in profile
+THRESHOLDS = ("prescreen_threshold", "escalate_score", "cutoff_score", "hard_rules")
+# Expected shape of a profile file (and of its "profile" object), checked on load
+FILE_FIELDS = {
+    "chat_id": (str, int), "chat_id_env": str, "profile": dict, "keywords": list, "search_urls": dict,
+    "hook_skills": str, "prescreen_threshold": (int, float), "escalate_score": (int, float),
+    "cutoff_score": (int, float), "hard_rules": bool,
+}
+PROFILE_TEXT = ("name", "headline", "location", "summary")
+PROFILE_GROUPS = ("core_competencies", "tech_stack")  # {"group": ["item", ...]}
+PROFILE_LISTS = ("key_achievements", "education", "languages")  # ["item", ...]
+PROFILE_ENTRIES = ("projects", "work_history")  # [{"name": ..., ...}, ...]
+
+
+class Profile:
+    """One candidate: what they are looking for, how picky to be and where their alerts go."""
+
+    def __init__(self, name, chat_id, user_profile=None, keywords=(), search_urls=None, hook_skills="",
+                 prescreen_threshold=0.0, escalate_score=0, cutoff_score=0, hard_rules=True):
+        self.name = name
+        self.chat_id = chat_id
+        self.user_profile = user_profile or {}
+        self.keywords = list(keywords)
+        self.search_urls = dict(search_urls or {})
+        self.hook_skills = hook_skills or "my skills and results"
+        self.prescreen_threshold = prescreen_threshold
+        self.escalate_score = escalate_score
+        self.cutoff_score = cutoff_score
+        self.hard_rules = hard_rules
+
+    @property
+    def is_default(self):
+        return self.name == DEFAULT_PROFILE_NAME
+
+    @property
+    def candidate(self):
+        return self.user_profile.get("name", self.name)
+
+    def file_name(self, base):
+        """Per-profile state file next to base ("pending_alerts_ai.json" -> "pending_alerts_ai_alice.json")."""
+        if self.is_default:
+            return base
+        stem, ext = os.path.splitext(base)
+        return f"{stem}_{self.name}{ext}"
+
+
+def _strings(value):
+    return isinstance(value, list) and all(isinstance(item, str) for item in value)
+
+
+def check_profile_file(data):
+    """Raises ValueError naming the first field of a profile file that has the wrong shape."""
+    if not isinstance(data, dict):
+        raise ValueError("expected a JSON object")
+    for field, kind in FILE_FIELDS.items():
+        if field not in data:
+            continue
+        value = data[field]
+        # bool is an int subclass, but "cutoff_score": true is still a mistake
+        if not isinstance(value, kind) or (isinstance(value, bool) and kind is not bool):
+            raise ValueError(f"{field} has the wrong type ({type(value).__name__})")
+    if not _strings(data.get("keywords", [])):
+        raise ValueError("keywords must be a list of strings")
+    if not all(isinstance(v, str) for v in data.get("search_urls", {}).values()):
+        raise ValueError("search_urls must map category names to URLs")
+    profile = data.get("profile", {})
+    for field in PROFILE_TEXT:
+        if not isinstance(profile.get(field, ""), str):
+            raise ValueError(f"profile.{field} must be a string")
+    for field in PROFILE_GROUPS:
+        groups = profile.get(field, {})
+        if not isinstance(groups, dict) or not all(_strings(items) for items in groups.values()):
+            raise ValueError(f"profile.{field} must map group names to lists of strings")
+    for field in PROFILE_LISTS:
+        if not _strings(profile.get(field, [])):
+            raise ValueError(f"profile.{field} must be a list of strings")
+    for field in PROFILE_ENTRIES:
+        entries = profile.get(field, [])
+        if not isinstance(entries, list) or not all(isinstance(entry, dict) for entry in entries):
+            raise ValueError(f"profile.{field} must be a list of objects")
+
+
+def load_profiles(default, directory=PROFILES_DIR):
+    """Returns [default] plus one Profile per <directory>/<name>.json (sorted by name)."""
+    profiles = [default]
+    for path in sorted(glob.glob(os.path.join(directory, "*.json"))):
+        name = os.path.splitext(os.path.basename(path))[0]
+        if name == DEFAULT_PROFILE_NAME:
+            print(f"Skipping profile {path}: the name {name} is taken by the built-in profile.")
+            continue
+        try:
+            with open(path, "r") as f:
+                data = json.load(f)
+            check_profile_file(data)
+        except Exception as e:
+            print(f"Skipping profile {path}: {e}")
+            continue
+        chat_id = data.get("chat_id") or os.environ.get(data.get("chat_id_env", ""))
+        if not chat_id:
+            print(f"Skipping profile {name}: no chat_id.")
+            continue
+        settings = {key: data.get(key, getattr(default, key)) for key in THRESHOLDS}
+        profiles.append(Profile(
+            name, str(chat_id), data.get("profile"), data.get("keywords", ()), data.get("search_urls"),
+            data.get("hook_skills", ""), **settings,
+        ))
+    if len(profiles) > 1:
+        print(f"Matching jobs against {len(profiles)} profiles: {', '.join(p.name for p in profiles)}.")
+    return profiles
+
+
+def merged_search_urls(profiles):
+    """Every profile's englishjobs categories, for the one shared sweep."""
+    urls = {}
+    for profile in profiles:
+        for category, url in profile.search_urls.items():
+            urls.setdefault(category, url)
+    return urls
+
+
+def merged_keywords(profiles):
+    return list(dict.fromkeys(keyword for profile in profiles for keyword in profile.keywords))
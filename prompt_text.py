@@ -0,0 +1,181 @@
+import os
+import re
+
+# --- CONFIGURATION ---
+# Size of the job description that goes into a prompt, in (estimated) tokens
+AI_DESCRIPTION_TOKENS = int(os.environ.get("AI_DESCRIPTION_TOKENS", "900"))
+# Rough English average; good enough to budget without shipping a tokenizer
+CHARS_PER_TOKEN = 4
+
+# Lines that are page chrome, not job content (mostly from the whole-body fallback)
+BOILERPLATE = re.compile(
+    r"cookie|privacy policy|terms of (use|service)|all rights reserved|©|sign in|log in|create (an )?account"
+    r"|share (this|on)|apply (now|for this job)|save (this )?job|similar jobs|related jobs|follow us"
+    r"|subscribe to|sign up for|back to (top|search)|report (this )?job|job alerts?$",
+    re.IGNORECASE,
+)
+# Section headings, by how much they matter for judging a match (lower first)
+SECTION_PRIORITY = [
+    (re.compile(
+        r"requirement|qualification|profile|profil|about you|who you are|what we.re looking for|must.have"
+        r"|skills|compétences|experience|expérience|you have|you are|your background",
+        re.IGNORECASE), 0),
+    (re.compile(r"language|langue", re.IGNORECASE), 1),
+    (re.compile(
+        r"responsibilit|mission|the role|your role|what you.ll do|tasks|duties|poste|job description",
+        re.IGNORECASE), 2),
+    (re.compile(r"benefit|perks|we offer|avantages|about us|who we are|company|équipe|team", re.IGNORECASE), 4),
+]
+LANGUAGE_LINE = re.compile(r"\b(english|french|anglais|français|francais|bilingual|bilingue|native|fluent)\b", re.IGNORECASE)
+WHITESPACE = re.compile(r"[ \t ]+")
+HEADING_MAX_WORDS = 6
+# Longer lines that open with the same words are one template repeated (e.g. "similar jobs" snippets)
+TEMPLATE_PREFIX_WORDS = 6
+# This many short lines in a row (outside requirement/role sections) is a menu, not content
+MENU_RUN = 5
+
+
+def estimate_tokens(text):
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def _heading_priority(line):
+    """Priority of the section a heading line opens, None if the line is not a heading."""
+    words = line.rstrip(":").split()
+    if not words or len(words) > HEADING_MAX_WORDS:
+        return None
+    # Without a colon only short, number-free lines count ("5 years experience" is content)
+    if not line.endswith(":") and (len(words) > 4 or line.endswith(".") or any(c.isdigit() for c in line)):
+        return None
+    for pattern, priority in SECTION_PRIORITY:
+        if pattern.search(line):
+            return priority
+    return 3 if line.endswith(":") else None
+
+
+def clean_lines(text):
+    """Normalized, boilerplate-free lines with repeated lines/blocks dropped."""
+    seen = set()
+    lines = []
+    for raw in text.splitlines():
+        line = WHITESPACE.sub(" ", raw).strip()
+        if not line or (len(line) < 80 and BOILERPLATE.search(line)):
+            continue
+        words = line.lower().split()
+        keys = [" ".join(words)]
+        if len(words) > 2 * TEMPLATE_PREFIX_WORDS:
+            keys.append(" ".join(words[:TEMPLATE_PREFIX_WORDS]) + " …")
+        if any(key in seen for key in keys):
+            continue
+        seen.update(keys)
+        lines.append(line)
+    return lines
+
+
+def _drop_menus(lines):
+    """Removes runs of MENU_RUN+ short link-like lines (navigation from the whole-body fallback)."""
+    kept, run = [], []
+    for line in lines + [None]:
+        if line is not None and len(line.split()) <= 3 and not line.endswith((".", ":")):
+            run.append(line)
+            continue
+        if len(run) < MENU_RUN:
+            kept.extend(run)
+        run = []
+        if line is not None:
+            kept.append(line)
+    return kept
+
+
+def compress_description(text, budget_tokens=AI_DESCRIPTION_TOKENS):
+    """Fits a job description to the token budget, keeping what decides a match first.
+
+    Requirement sections come first, then any line that mentions languages, then the
+    role itself, then everything else; benefits and company blurb go last.
+    """
+    lines = clean_lines(text or "")
+    sections = []  # [priority, lines]
+    current = [3, []]
+    for line in lines:
+        priority = _heading_priority(line)
+        if priority is not None:
+            if current[1]:
+                sections.append(current)
+            current = [priority, [line]]
+        else:
+            current[1].append(line)
+    if current[1]:
+        sections.append(current)
+    # Menus and sidebars live outside the sections that describe the job itself
+    for section in sections:
+        if section[0] >= 3:
+            section[1] = _drop_menus(section[1])
+
+    sections.sort(key=lambda s: s[0])
+    ordered = [line for _, block in sections for line in block]
+    # Language requirements decide most matches; lift them to the front if they sit elsewhere
+    # (not out of benefits/company sections, where "English" is a perk or a pitch)
+    languages = [line for priority, block in sections if priority < 4 for line in block if LANGUAGE_LINE.search(line)]
+    lifted = set(languages)
+    ordered = languages + [line for line in ordered if line not in lifted]
+
+    budget = budget_tokens * CHARS_PER_TOKEN
+    kept, used = [], 0
+    for line in ordered:
+        if used + len(line) + 1 > budget:
+            if not kept:
+                kept.append(line[:budget])
+            break
+        kept.append(line)
+        used += len(line) + 1
+    return "\n".join(kept)
+
+
+def compact_profile(profile):
+    """Renders the profile as terse text for prompts: same facts as the JSON, far fewer tokens.
+
+    Contact details are left out; they never change a match. Fields and sections a
+    profile file leaves out (or leaves empty) are skipped.
+    """
+    out = [
+        f"{label}: {profile[field]}"
+        for field, label in (("name", "Name"), ("headline", "Headline"), ("location", "Location"), ("summary", "Summary"))
+        if profile.get(field)
+    ]
+    for field, label in (("core_competencies", "Competencies"), ("tech_stack", "Stack")):
+        groups = {group: items for group, items in (profile.get(field) or {}).items() if items}
+        if groups:
+            out.append(f"{label}: " + "; ".join(f"{group}: {', '.join(items)}" for group, items in groups.items()))
+    if profile.get("key_achievements"):
+        out.append("Achievements:")
+        out.extend(f"- {item}" for item in profile["key_achievements"])
+    projects = [
+        _entry(p.get("name"), p.get("stack") and f"({p['stack']})", p.get("description"))
+        for p in profile.get("projects") or []
+    ]
+    _section(out, "Projects:", projects)
+    work = [
+        _entry(w.get("role") and (w["role"] + (f" @ {w['company']}" if w.get("company") else "")), None, w.get("impact"))
+        for w in profile.get("work_history") or []
+    ]
+    _section(out, "Experience:", work)
+    if profile.get("education"):
+        out.append("Education: " + "; ".join(profile["education"]))
+    if profile.get("languages"):
+        out.append("Languages: " + ", ".join(profile["languages"]))
+    return "\n".join(out)
+
+
+def _entry(head, detail, text):
+    """"- head (detail): text", leaving out whatever is missing ("" when everything is)."""
+    line = " ".join(part for part in (head, detail) if part)
+    if text:
+        line = f"{line}: {text}" if line else text
+    return f"- {line}" if line else ""
+
+
+def _section(out, heading, lines):
+    lines = [line for line in lines if line]
+    if lines:
+        out.append(heading)
+        out.extend(lines)
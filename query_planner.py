@@ -0,0 +1,165 @@
+import json
+import os
+import sys
+
+# --- CONFIGURATION ---
+QUERY_STATS_FILE = os.environ.get("QUERY_STATS_FILE", "query_stats.json")
+QUERY_PLANNER_ENABLED = os.environ.get("QUERY_PLANNER", "1") != "0"
+# Weight of the latest run in the moving averages
+ALPHA = 0.3
+# A query needs this many runs of history before the planner may skip it
+MIN_RUNS = int(os.environ.get("PLANNER_MIN_RUNS", "5"))
+# New jobs per request below which a query counts as low-yield
+MIN_YIELD = float(os.environ.get("PLANNER_MIN_YIELD", "0.2"))
+# Share of a query's results another query also returns for it to count as covered by it
+MERGE_OVERLAP = float(os.environ.get("PLANNER_MERGE_OVERLAP", "0.8"))
+# A skipped query still runs after this many skipped runs, so its stats stay current
+MAX_SKIPS = int(os.environ.get("PLANNER_MAX_SKIPS", "4"))
+
+
+def query_key(location, keyword):
+    return f"{location}|{keyword}"
+
+
+def ewma(old, new):
+    return new if old is None else (1 - ALPHA) * old + ALPHA * new
+
+
+class QueryPlanner:
+    """Per-query yield statistics and the run plan derived from them.
+
+    For every search it keeps moving averages of new jobs per request and block
+    incidence, and how much of its results other searches also return. Queries that
+    rarely find anything new and whose results another (better) query already covers
+    are merged into that query; queries that find nothing at all are skipped. Neither
+    is permanent: each still runs after MAX_SKIPS skipped runs.
+    """
+
+    def __init__(self, path=QUERY_STATS_FILE):
+        self.path = path
+        self.stats = {}
+        self._run_ids = {}
+        if os.path.exists(path):
+            try:
+                with open(path, "r") as f:
+                    self.stats = json.load(f)
+            except Exception:
+                self.stats = {}
+
+    def _entry(self, key):
+        return self.stats.setdefault(key, {
+            "runs": 0, "requests": 0, "new_total": 0, "yield": None,
+            "block_rate": None, "overlap": {}, "skipped_streak": 0,
+        })
+
+    def score(self, key):
+        entry = self.stats.get(key)
+        if not entry or entry["yield"] is None:
+            return float("inf")  # never measured: run it early
+        return entry["yield"] * (1 - (entry["block_rate"] or 0))
+
+    def covered_by(self, key, running, owners=None):
+        """The running query that returns most of this query's results, if any.
+
+        With owners (query key -> who gets its results), only a query whose results reach
+        everyone this one's do can cover it.
+        """
+        entry = self.stats.get(key) or {}
+        mine = (owners or {}).get(key, set())
+        best = None
+        for other, share in entry.get("overlap", {}).items():
+            if owners is not None and not mine <= owners.get(other, set()):
+                continue
+            if other in running and share >= MERGE_OVERLAP and self.score(other) >= self.score(key):
+                if best is None or share > entry["overlap"][best]:
+                    best = other
+        return best
+
+    def plan(self, queries, owners=None):
+        """Splits (location, keyword) queries into (ordered queries to run, [(query, reason)] skipped).
+
+        owners maps a query (location, keyword) to the set of consumers of its results;
+        merging never moves a query into one that some of its consumers do not get.
+        """
+        queries = list(queries)
+        if not QUERY_PLANNER_ENABLED:
+            return queries, []
+
+        if owners is not None:
+            owners = {query_key(*query): set(names) for query, names in owners.items()}
+        ordered = sorted(queries, key=lambda q: -self.score(query_key(*q)))
+        to_run, skipped = [], []
+        running = set()
+        # Best first, so a query is only ever folded into one that is already certain to run
+        for query in ordered:
+            key = query_key(*query)
+            entry = self.stats.get(key)
+            reason = None
+            if entry and entry["runs"] >= MIN_RUNS and entry["skipped_streak"] < MAX_SKIPS:
+                if (entry["yield"] or 0) < MIN_YIELD:
+                    partner = self.covered_by(key, running, owners)
+                    if partner:
+                        reason = f"merged into {partner.split('|', 1)[1]}"
+                    elif (entry["yield"] or 0) < MIN_YIELD / 4:
+                        reason = "no new jobs lately"
+            if reason:
+                skipped.append((query, reason))
+                entry["skipped_streak"] += 1
+            else:
+                to_run.append(query)
+                running.add(key)
+                if entry:
+                    entry["skipped_streak"] = 0
+        return to_run, skipped
+
+    def record(self, location, keyword, ids, new_count, requests):
+        """One completed search: every job ID it returned, how many were new, pages fetched."""
+        key = query_key(location, keyword)
+        entry = self._entry(key)
+        entry["runs"] += 1
+        entry["requests"] += requests
+        entry["new_total"] += new_count
+        entry["yield"] = ewma(entry["yield"], new_count / max(1, requests))
+        entry["block_rate"] = ewma(entry["block_rate"], 0.0)
+        self._run_ids[key] = set(ids)
+
+    def record_block(self, location, keyword):
+        entry = self._entry(query_key(location, keyword))
+        entry["block_rate"] = ewma(entry["block_rate"], 1.0)
+
+    def finish_run(self):
+        """Updates pairwise overlap from the result sets of the searches that ran together."""
+        for key, ids in self._run_ids.items():
+            if not ids:
+                continue
+            overlap = self.stats[key]["overlap"]
+            for other, other_ids in self._run_ids.items():
+                if other == key:
+                    continue
+                share = round(ewma(overlap.get(other), len(ids & other_ids) / len(ids)), 3)
+                if share > 0.01:
+                    overlap[other] = share
+                else:
+                    overlap.pop(other, None)
+        self._run_ids = {}
+
+    def save(self):
+        with open(self.path, "w") as f:
+            json.dump(self.stats, f, indent=1, sort_keys=True)
+
+    def report(self):
+        lines = [f"{'query':<40} {'runs':>5} {'reqs':>5} {'new':>5} {'yield':>6} {'blocks':>6}  most overlap"]
+        for key in sorted(self.stats, key=lambda k: -self.score(k)):
+            entry = self.stats[key]
+            top = max(entry["overlap"].items(), key=lambda item: item[1], default=None)
+            lines.append(
+                f"{key.split('|', 1)[1][:40]:<40} {entry['runs']:>5} {entry['requests']:>5}"
+                f" {entry['new_total']:>5} {entry['yield'] or 0:>6.2f} {entry['block_rate'] or 0:>6.0%}"
+                + (f"  {top[1]:.0%} {top[0].split('|', 1)[1]}" if top else "")
+            )
+        return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    # python query_planner.py [stats.json] -- prints the per-query report
+    print(QueryPlanner(sys.argv[1] if len(sys.argv) > 1 else QUERY_STATS_FILE).report())
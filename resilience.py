@@ -0,0 +1,189 @@
+import os
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+# --- CONFIGURATION ---
+# Consecutive failures (connection errors, timeouts, 5xx) that open a host's circuit
+CIRCUIT_FAILURES = int(os.environ.get("CIRCUIT_FAILURES", "5"))
+# How long an open circuit fails fast before one trial request is let through
+CIRCUIT_COOLDOWN = float(os.environ.get("CIRCUIT_COOLDOWN", "60"))
+# Retry n waits uniform(0, RETRY_BASE * 2**n) seconds ("full jitter"), at most RETRY_CAP
+RETRY_BASE = float(os.environ.get("HTTP_RETRY_BASE", "0.5"))
+RETRY_CAP = 10.0
+# A hedged request that has not answered after this many seconds gets a second copy
+# racing it; the first answer wins (0 = no hedging)
+HEDGE_AFTER = float(os.environ.get("HTTP_HEDGE_AFTER", "0"))
+# Share of hedgeable requests that may actually be hedged, so a slow host never sees double the load
+HEDGE_BUDGET = 0.1
+# Seconds a one-shot run may take in total (0 = no limit). Set it below the workflow's
+# timeout-minutes; the daemon has no budget.
+RUN_BUDGET = float(os.environ.get("RUN_BUDGET", "0"))
+# New work stops this long before the budget is up, so calls in flight can finish and
+# seen state and pending alerts are saved in time
+RUN_RESERVE = float(os.environ.get("RUN_RESERVE", "90"))
+
+
+class CircuitOpen(Exception):
+    """Raised instead of calling a host whose circuit is open."""
+
+    def __init__(self, host, retry_in):
+        super().__init__(f"circuit open for {host} (next try in {retry_in:.0f}s)")
+        self.host = host
+
+
+class CircuitBreaker:
+    """Closed -> open after CIRCUIT_FAILURES failures in a row -> one trial after the cooldown.
+
+    A successful trial closes the circuit again; a failed one re-opens it.
+    """
+
+    def __init__(self, host, failures=CIRCUIT_FAILURES, cooldown=CIRCUIT_COOLDOWN):
+        self.host = host
+        self.threshold = max(1, failures)
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self.trial = False  # a trial request is in flight
+        self._lock = threading.Lock()
+
+    def before(self):
+        """Raises CircuitOpen if the host must not be called right now."""
+        with self._lock:
+            if self.opened_at is None:
+                return
+            retry_in = self.opened_at + self.cooldown - time.monotonic()
+            if retry_in > 0 or self.trial:
+                raise CircuitOpen(self.host, max(0.0, retry_in))
+            self.trial = True
+
+    def success(self):
+        with self._lock:
+            if self.opened_at is not None:
+                print(f"🟢 {self.host} is answering again, circuit closed.")
+            self.failures, self.opened_at, self.trial = 0, None, False
+
+    def release(self):
+        """Ends a request that was neither a success nor a host failure (our own error):
+        a trial in flight must not keep the circuit shut for good."""
+        with self._lock:
+            self.trial = False
+
+    def failure(self):
+        """Counts a failure; returns True when it opened (or re-opened) the circuit."""
+        with self._lock:
+            self.failures += 1
+            if self.trial or (self.opened_at is None and self.failures >= self.threshold):
+                self.opened_at, self.trial = time.monotonic(), False
+                print(f"🔴 {self.host} failed {self.failures} times in a row, circuit open for {self.cooldown:.0f}s.")
+                return True
+            return False
+
+
+class Breakers:
+    """One CircuitBreaker per host, created on first use."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hosts = {}
+
+    def get(self, host):
+        with self._lock:
+            if host not in self.hosts:
+                self.hosts[host] = CircuitBreaker(host)
+            return self.hosts[host]
+
+
+def backoff(attempt, retry_after=None):
+    """Seconds to wait before retry number attempt (0-based): full jitter, or Retry-After if longer."""
+    wait_for = random.uniform(0, min(RETRY_CAP, RETRY_BASE * 2 ** attempt))
+    if retry_after is not None:
+        wait_for = max(wait_for, min(RETRY_CAP, retry_after))
+    return wait_for
+
+
+class Hedger:
+    """Races a second copy of a slow call against the first one; the first answer wins.
+
+    Only HEDGE_BUDGET of the calls may be hedged. The losing copy runs to completion in
+    the background (a blocking request cannot be cancelled).
+    """
+
+    def __init__(self, after=HEDGE_AFTER, budget=HEDGE_BUDGET, workers=16):
+        self.after = after
+        self.budget = budget
+        self.calls = 0
+        self.hedged = 0
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="hedge") if after > 0 else None
+
+    def _may_hedge(self):
+        with self._lock:
+            if self.hedged + 1 > self.budget * self.calls:
+                return False
+            self.hedged += 1
+            return True
+
+    def call(self, fn):
+        """fn() with a hedge; returns (result, hedged)."""
+        if self._pool is None:
+            return fn(), False
+        with self._lock:
+            self.calls += 1
+        first = self._pool.submit(fn)
+        done, _ = wait([first], timeout=self.after)
+        if done or not self._may_hedge():
+            return first.result(), False
+        second = self._pool.submit(fn)
+        done, _ = wait([first, second], return_when=FIRST_COMPLETED)
+        winner = done.pop()
+        if winner.exception() is not None:
+            # The quicker copy failed; the other one may still make it
+            return (second if winner is first else first).result(), True
+        return winner.result(), True
+
+
+class Deadline:
+    """Time budget of a one-shot run, counted from process start (RUN_BUDGET).
+
+    At the cutoff (RUN_RESERVE before the end) the registered callbacks fire, so the bots
+    stop taking on new work; timeouts and waits are kept inside the budget.
+    """
+
+    def __init__(self, budget=RUN_BUDGET, reserve=RUN_RESERVE):
+        now = time.monotonic()
+        self.end = now + budget if budget > 0 else None
+        self.cutoff = max(now, self.end - reserve) if self.end is not None else None
+        self._timers = []
+
+    def on_cutoff(self, callback):
+        if self.cutoff is None:
+            return
+        timer = threading.Timer(max(0.0, self.cutoff - time.monotonic()), callback)
+        timer.daemon = True
+        timer.start()
+        self._timers.append(timer)
+
+    def cancel(self):
+        """No budget at all from here on (the daemon runs for as long as it likes)."""
+        for timer in self._timers:
+            timer.cancel()
+        self._timers = []
+        self.end = self.cutoff = None
+
+    def expired(self):
+        """Past the cutoff: start nothing new."""
+        return self.cutoff is not None and time.monotonic() >= self.cutoff
+
+    def left(self):
+        """Seconds until the budget is up (inf without a budget)."""
+        return float("inf") if self.end is None else max(0.0, self.end - time.monotonic())
+
+    def clamp(self, timeout):
+        """A request timeout that does not run past the budget."""
+        return max(1.0, min(timeout, self.left()))
+
+
+breakers = Breakers()
+deadline = Deadline()
@@ -0,0 +1,271 @@
+import hashlib
+import json
+import math
+import os
+import sqlite3
+import struct
+import threading
+import time
+from array import array
+from bisect import bisect_left
+
+from job_ids import canonical_job_id
+
+# --- CONFIGURATION ---
+# Forget jobs first seen more than this many days ago (0 keeps everything forever)
+SEEN_TTL_DAYS = float(os.environ.get("SEEN_TTL_DAYS", "120"))
+# VACUUM once this share of the file is free pages left behind by evictions
+COMPACT_FREE_RATIO = 0.25
+# "sqlite" (exact IDs) or "compact" (sorted array of hashed IDs, see CompactSeenStore)
+SEEN_BACKEND = os.environ.get("SEEN_BACKEND", "sqlite")
+# Compact backend sizing: odds that an unseen job is reported as seen once the store
+# holds SEEN_EXPECTED_IDS jobs. Sets how many hash bits are kept per ID.
+SEEN_FALSE_POSITIVE_RATE = float(os.environ.get("SEEN_FALSE_POSITIVE_RATE", "1e-6"))
+SEEN_EXPECTED_IDS = int(os.environ.get("SEEN_EXPECTED_IDS", "50000"))
+# Long-running processes (daemon.py) set this: save() then keeps compact stores in memory
+# and only checkpoint() writes them out
+DEFER_WRITES = False
+
+
+class SeenStore:
+    """Seen job IDs in an indexed SQLite file.
+
+    Membership checks and inserts touch one index entry, so opening, checking and saving
+    cost the same whether the store holds 100 IDs or 1M. Entries carry their first-seen
+    time and are evicted after SEEN_TTL_DAYS.
+    """
+
+    def __init__(self, path, legacy_json=None, ttl_days=SEEN_TTL_DAYS):
+        self.path = path
+        self.ttl_days = ttl_days
+        self.added = 0
+        self._lock = threading.RLock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS seen (job_id TEXT PRIMARY KEY, first_seen INTEGER NOT NULL) WITHOUT ROWID"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS seen_first_seen ON seen (first_seen)")
+        self._canonicalize_rows()
+        if legacy_json:
+            self._import_legacy(legacy_json)
+        self.evict()
+        self.conn.commit()
+
+    def _canonicalize_rows(self):
+        # Stores written before job_ids.py held full URLs; rewrite them once to canonical IDs
+        if self.conn.execute("PRAGMA user_version").fetchone()[0] >= 1:
+            return
+        self.conn.create_function("canonical_job_id", 1, canonical_job_id)
+        self.conn.execute(
+            "INSERT OR IGNORE INTO seen SELECT canonical_job_id(job_id), MIN(first_seen) FROM seen"
+            " WHERE job_id != canonical_job_id(job_id) GROUP BY canonical_job_id(job_id)"
+        )
+        self.conn.execute("DELETE FROM seen WHERE job_id != canonical_job_id(job_id)")
+        self.conn.execute("PRAGMA user_version = 1")
+
+    def _import_legacy(self, legacy_json):
+        # One-off migration from the old "list of IDs" JSON files
+        if not os.path.exists(legacy_json):
+            return
+        if self.conn.execute("SELECT 1 FROM seen LIMIT 1").fetchone():
+            return
+        try:
+            with open(legacy_json, "r") as f:
+                ids = json.load(f)
+        except Exception:
+            return
+        now = int(time.time())
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO seen VALUES (?, ?)", ((canonical_job_id(job_id), now) for job_id in ids)
+        )
+        print(f"Imported {len(ids)} seen jobs from {legacy_json}.")
+
+    def __contains__(self, job_id):
+        with self._lock:
+            row = self.conn.execute("SELECT 1 FROM seen WHERE job_id = ?", (canonical_job_id(job_id),)).fetchone()
+            return row is not None
+
+    def add(self, job_id):
+        with self._lock:
+            cur = self.conn.execute(
+                "INSERT OR IGNORE INTO seen VALUES (?, ?)", (canonical_job_id(job_id), int(time.time()))
+            )
+            self.added += cur.rowcount
+
+    def __len__(self):
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM seen").fetchone()[0]
+
+    def evict(self):
+        """Drops entries older than the TTL and compacts the file if that freed a lot of space."""
+        if not self.ttl_days:
+            return 0
+        cutoff = int(time.time() - self.ttl_days * 86400)
+        with self._lock:
+            removed = self.conn.execute("DELETE FROM seen WHERE first_seen < ?", (cutoff,)).rowcount
+            if removed:
+                self.conn.commit()
+                self.compact()
+        return removed
+
+    def compact(self):
+        with self._lock:
+            free = self.conn.execute("PRAGMA freelist_count").fetchone()[0]
+            pages = self.conn.execute("PRAGMA page_count").fetchone()[0]
+            if pages and free / pages >= COMPACT_FREE_RATIO:
+                self.conn.execute("VACUUM")
+
+    def save(self):
+        with self._lock:
+            self.conn.commit()
+
+    def checkpoint(self):
+        # Committing is already cheap; a checkpoint only adds the TTL sweep
+        self.evict()
+        self.save()
+
+    def close(self):
+        with self._lock:
+            self.conn.commit()
+            self.conn.close()
+
+
+class CompactSeenStore:
+    """Seen jobs as a sorted array of truncated 64-bit hashes of their canonical IDs.
+
+    Costs 12 bytes per job (hash + first-seen day), so with the TTL the file stays a few
+    hundred KB however long the bots run. Membership is probabilistic: an unseen job is
+    taken for a seen one with probability ~ len(store) / 2**bits, never the other way round.
+    """
+
+    MAGIC = b"SEEN"
+    HEADER = struct.Struct("<4sBI")
+
+    def __init__(self, path, legacy_json=None, ttl_days=SEEN_TTL_DAYS,
+                 false_positive_rate=SEEN_FALSE_POSITIVE_RATE, expected_ids=SEEN_EXPECTED_IDS):
+        self.path = path
+        self.ttl_days = ttl_days
+        self.added = 0
+        self._lock = threading.RLock()
+        self.hashes = array("Q")
+        self.days = array("I")
+        self.pending = {}
+        self.bits = min(64, max(16, math.ceil(math.log2(expected_ids / false_positive_rate))))
+        if os.path.exists(path):
+            self._load()
+        elif legacy_json and os.path.exists(legacy_json):
+            try:
+                with open(legacy_json, "r") as f:
+                    for job_id in json.load(f):
+                        self.add(job_id)
+                print(f"Imported {self.added} seen jobs from {legacy_json}.")
+                self.added = 0
+                self.save()
+            except Exception:
+                pass
+        self.evict()
+
+    def _load(self):
+        with open(self.path, "rb") as f:
+            magic, bits, count = self.HEADER.unpack(f.read(self.HEADER.size))
+            if magic != self.MAGIC:
+                raise ValueError(f"{self.path} is not a compact seen store")
+            # The file keeps the bit width it was created with
+            self.bits = bits
+            self.hashes.fromfile(f, count)
+            self.days.fromfile(f, count)
+
+    def _hash(self, job_id):
+        digest = hashlib.blake2b(canonical_job_id(job_id).encode("utf-8"), digest_size=8).digest()
+        return int.from_bytes(digest, "big") >> (64 - self.bits)
+
+    def _stored(self, h):
+        i = bisect_left(self.hashes, h)
+        return i < len(self.hashes) and self.hashes[i] == h
+
+    def __contains__(self, job_id):
+        h = self._hash(job_id)
+        with self._lock:
+            return h in self.pending or self._stored(h)
+
+    def add(self, job_id):
+        h = self._hash(job_id)
+        with self._lock:
+            if h not in self.pending and not self._stored(h):
+                self.pending[h] = int(time.time() // 86400)
+                self.added += 1
+
+    def __len__(self):
+        return len(self.hashes) + len(self.pending)
+
+    def _merge(self):
+        # Fold pending inserts into the sorted arrays (one sort per save, not per insert)
+        if not self.pending:
+            return
+        rows = sorted(list(zip(self.hashes, self.days)) + list(self.pending.items()))
+        self.hashes = array("Q", (h for h, _ in rows))
+        self.days = array("I", (d for _, d in rows))
+        self.pending = {}
+
+    def evict(self):
+        if not self.ttl_days:
+            return 0
+        cutoff = int((time.time() - self.ttl_days * 86400) // 86400)
+        with self._lock:
+            keep = [i for i, day in enumerate(self.days) if day >= cutoff]
+            removed = len(self.days) - len(keep)
+            if removed:
+                self.hashes = array("Q", (self.hashes[i] for i in keep))
+                self.days = array("I", (self.days[i] for i in keep))
+        return removed
+
+    def save(self):
+        with self._lock:
+            self._merge()
+            if not DEFER_WRITES:
+                self._write()
+
+    def checkpoint(self):
+        with self._lock:
+            self.evict()
+            self._merge()
+            self._write()
+
+    def _write(self):
+        with self._lock:
+            tmp = self.path + ".tmp"
+            with open(tmp, "wb") as f:
+                f.write(self.HEADER.pack(self.MAGIC, self.bits, len(self.hashes)))
+                self.hashes.tofile(f)
+                self.days.tofile(f)
+            os.replace(tmp, self.path)
+
+    def close(self):
+        self.checkpoint()
+
+
+# Every store opened in this process, by path. Opening the same store again returns the
+# live object, so a long-running process keeps them warm between runs.
+_open_stores = {}
+_open_lock = threading.Lock()
+
+
+def open_seen_store(name, legacy_json=None, backend=SEEN_BACKEND):
+    """Opens "<name>.db" (SQLite) or "<name>.bin" (compact) depending on SEEN_BACKEND."""
+    with _open_lock:
+        if backend == "compact":
+            path, cls = name + ".bin", CompactSeenStore
+        else:
+            path, cls = name + ".db", SeenStore
+        if path not in _open_stores:
+            _open_stores[path] = cls(path, legacy_json=legacy_json)
+        return _open_stores[path]
+
+
+def checkpoint_all():
+    """Evicts expired entries from every open store and writes them all to disk."""
+    with _open_lock:
+        stores = list(_open_stores.values())
+    for store in stores:
+        store.checkpoint()